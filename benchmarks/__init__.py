@@ -0,0 +1,4 @@
+"""Benchmarks hors ligne du bot (TMDB et Discord simulés).
+
+    python -m benchmarks.run --links 1000 100000 --backend sqlite json
+"""
@@ -0,0 +1,99 @@
+"""Catalogues synthétiques et déterministes : les titres, années et saisons
+d'un id sont toujours les mêmes, côté stockage comme côté faux TMDB."""
+import math
+import random
+
+WORDS = [
+    "ombre", "nuit", "soleil", "dernier", "retour", "mission", "cité", "empire", "secret", "voyage",
+    "guerre", "amour", "rivière", "montagne", "silence", "tempête", "royaume", "étoile", "chasseur", "mémoire",
+    "océan", "fantôme", "code", "frontière", "destin", "légende", "sang", "miroir", "horizon", "loup",
+]
+MOVIE_SHARE = 0.3           # Part des liens qui sont des films
+SEASONS_PER_SERIES = 3
+EPISODES_PER_SEASON = 10
+TV_ID_OFFSET = 10_000_000   # Ids des séries disjoints de ceux des films
+
+
+def title(media_type, media_id):
+    rnd = random.Random(f"{media_type}:{media_id}")
+    words = rnd.sample(WORDS, rnd.randint(1, 3))
+    return " ".join(words).capitalize() + f" {media_id % 97}"
+
+
+def year(media_id):
+    return str(1950 + media_id % 75)
+
+
+def link(media_type, media_id, season=0, episode=0):
+    return f"https://cdn.example.org/{media_type}/{media_id}/{season}/{episode}.mp4"
+
+
+def layout(n_links):
+    """(nombre de films, nombre de séries) pour environ `n_links` liens."""
+    movies = int(n_links * MOVIE_SHARE)
+    series = math.ceil((n_links - movies) / (SEASONS_PER_SERIES * EPISODES_PER_SEASON))
+    return movies, series
+
+
+def ids(n_links):
+    movies, series = layout(n_links)
+    return list(range(1, movies + 1)), list(range(TV_ID_OFFSET + 1, TV_ID_OFFSET + series + 1))
+
+
+def media_meta(media_type, media_id):
+    return {"title": title(media_type, media_id), "original_title": None, "year": year(media_id),
+            "poster_path": f"/{media_type}{media_id}.jpg", "genres": ["Drame"]}
+
+
+def build(store, n_links, batch=100_000):
+    """Remplit `store` par lots (une transaction par lot)."""
+    movie_ids, tv_ids = ids(n_links)
+    for start in range(0, len(movie_ids), batch):
+        chunk = movie_ids[start:start + batch]
+        store.bulk_import(
+            movies=[(i, link("movie", i), None) for i in chunk],
+            media=[("movie", i, media_meta("movie", i)) for i in chunk],
+        )
+    per_batch = max(1, batch // (SEASONS_PER_SERIES * EPISODES_PER_SEASON))
+    for start in range(0, len(tv_ids), per_batch):
+        chunk = tv_ids[start:start + per_batch]
+        store.bulk_import(
+            seasons=[(i, s, [link("tv", i, s, e) for e in range(1, EPISODES_PER_SEASON + 1)])
+                     for i in chunk for s in range(1, SEASONS_PER_SERIES + 1)],
+            media=[("tv", i, media_meta("tv", i)) for i in chunk],
+        )
+
+
+# --- Réponses TMDB ---
+def movie_info(media_id):
+    return {"id": media_id, "title": title("movie", media_id), "release_date": f"{year(media_id)}-01-01",
+            "overview": "Synopsis de test. " * 20, "poster_path": f"/movie{media_id}.jpg",
+            "genres": [{"id": 18, "name": "Drame"}]}
+
+
+def tv_info(media_id):
+    return {"id": media_id, "name": title("tv", media_id), "first_air_date": f"{year(media_id)}-01-01",
+            "overview": "Synopsis de test. " * 20, "poster_path": f"/tv{media_id}.jpg",
+            "genres": [{"id": 18, "name": "Drame"}],
+            "seasons": [{"season_number": s} for s in range(0, SEASONS_PER_SERIES + 1)]}
+
+
+def season_info(media_id, season):
+    return {"season_number": season, "air_date": f"{year(media_id)}-09-01", "overview": "Saison de test.",
+            "poster_path": f"/tv{media_id}s{season}.jpg",
+            "episodes": [{"episode_number": e} for e in range(1, EPISODES_PER_SEASON + 1)]}
+
+
+def videos_info(media_type, media_id):
+    return {"id": media_id, "results": [{"site": "YouTube", "type": "Trailer", "key": f"{media_type}{media_id}"}]}
+
+
+def search_page(query, page, total_pages=5):
+    rnd = random.Random(f"{query}:{page}")
+    results = []
+    for _ in range(20):
+        media_type = rnd.choice(["movie", "tv", "person"])
+        media_id = rnd.randint(1, 10_000)
+        results.append({"media_type": media_type, "id": media_id,
+                        "title" if media_type == "movie" else "name": title(media_type, media_id)})
+    return {"page": page, "results": results, "total_pages": total_pages, "total_results": total_pages * 20}
@@ -0,0 +1,97 @@
+"""Faux serveur TMDB (aiohttp) servant les réponses de `catalogue`.
+
+Autonome : python -m benchmarks.fake_tmdb --port 8089 --latency 0.05
+puis lancer le bot avec TMDB_BASE_URL=http://127.0.0.1:8089/3
+"""
+import argparse
+import asyncio
+import socket
+
+from aiohttp import web
+
+from benchmarks import catalogue
+
+
+class FakeTMDB:
+    def __init__(self, latency=0.0):
+        self.latency = latency  # Délai simulé par requête (secondes)
+        self.requests = 0
+        self._runner = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/3/search/multi", self.search)
+        app.router.add_get("/3/movie/{id:\\d+}", self.movie)
+        app.router.add_get("/3/tv/{id:\\d+}", self.tv)
+        app.router.add_get("/3/tv/{id:\\d+}/season/{season:\\d+}", self.season)
+        app.router.add_get("/3/movie/{id:\\d+}/videos", self.videos)
+        app.router.add_get("/3/tv/{id:\\d+}/videos", self.videos)
+        return app
+
+    async def _reply(self, data):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(data)
+
+    async def search(self, request):
+        page = int(request.query.get("page", 1))
+        return await self._reply(catalogue.search_page(request.query.get("query", ""), page))
+
+    @staticmethod
+    def _appended(request, media_type, media_id, data):
+        """Sous-ressources demandées via append_to_response (« season/N », « videos »),
+        ajoutées à la réponse sous leur nom comme le fait TMDB."""
+        for sub in filter(None, request.query.get("append_to_response", "").split(",")):
+            if sub == "videos":
+                data[sub] = catalogue.videos_info(media_type, media_id)
+            elif media_type == "tv" and sub.startswith("season/") and sub[7:].isdigit():
+                data[sub] = catalogue.season_info(media_id, int(sub[7:]))
+        return data
+
+    async def movie(self, request):
+        media_id = int(request.match_info["id"])
+        return await self._reply(self._appended(request, "movie", media_id, catalogue.movie_info(media_id)))
+
+    async def tv(self, request):
+        media_id = int(request.match_info["id"])
+        return await self._reply(self._appended(request, "tv", media_id, catalogue.tv_info(media_id)))
+
+    async def videos(self, request):
+        media_type = request.path.split("/")[2]
+        return await self._reply(catalogue.videos_info(media_type, int(request.match_info["id"])))
+
+    async def season(self, request):
+        return await self._reply(catalogue.season_info(int(request.match_info["id"]), int(request.match_info["season"])))
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Démarre le serveur et renvoie l'URL de base à passer au TMDBClient."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+        return f"http://{host}:{sock.getsockname()[1]}/3"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur TMDB pour les benchmarks")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    async def run():
+        print(f"TMDB_BASE_URL={await FakeTMDB(args.latency).start(port=args.port)}")
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
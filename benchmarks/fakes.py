@@ -0,0 +1,64 @@
+"""Fausses interactions Discord : enregistrent les réponses au lieu de les
+envoyer, après les avoir sérialisées comme le ferait discord.py."""
+import itertools
+
+import discord
+
+_ids = itertools.count(1)
+
+
+class FakeUser:
+    def __init__(self, user_id, admin=False):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.guild_permissions = discord.Permissions(administrator=admin)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.calls = []
+
+    def is_done(self):
+        return bool(self.calls)
+
+    def _record(self, kind, content=None, embed=None, view=None, **kwargs):
+        payload = {"content": content}
+        if embed is not None:
+            payload["embed"] = embed.to_dict()
+        if view is not None:
+            payload["components"] = view.to_components()
+        self.calls.append((kind, payload))
+
+    async def send_message(self, content=None, **kwargs):
+        self._record("send_message", content, **kwargs)
+
+    async def edit_message(self, content=None, **kwargs):
+        self._record("edit_message", content, **kwargs)
+
+    async def defer(self, **kwargs):
+        self._record("defer")
+
+    async def send_modal(self, modal):
+        self._record("send_modal")
+
+
+class FakeFollowup:
+    def __init__(self, response):
+        self.response = response
+
+    async def send(self, content=None, **kwargs):
+        self.response._record("followup", content, **kwargs)
+
+
+class FakeInteraction:
+    def __init__(self, user_id=1, data=None, admin=False, guild_id=1,
+                 type=discord.InteractionType.component):
+        self.id = next(_ids)
+        self.type = type
+        self.user = FakeUser(user_id, admin)
+        self.guild_id = guild_id
+        self.data = data or {}
+        self.extras = {}
+        self.command = None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup(self.response)
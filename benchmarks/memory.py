@@ -0,0 +1,157 @@
+"""Mémoire et temps de chargement du stockage JSON : ancien format (tout
+db_links.json en dictionnaires + index des saisons) contre instantané
+compact (compact.py) lu par mmap.
+
+Chaque mesure tourne dans un processus neuf ; les fichiers sont générés une
+fois par taille dans un dossier temporaire. Le tas Python (tracemalloc) est
+mesuré dans un processus à part : tracemalloc fausserait le temps et la RSS.
+
+    python -m benchmarks.memory --links 100000 1000000
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.run import ROOT, print_table, rss_mb
+
+MODES = ("dict", "compact")
+FAVORITES_PER_USER = 10
+LINKS_PER_USER = 100        # Un utilisateur avec des favoris pour 100 liens
+LOOKUPS = 100_000
+
+
+def legacy_db(n_links):
+    """Contenu de db_links.json à l'ancien format (liens dans le JSON)."""
+    from benchmarks import catalogue
+    from storage import empty_db, link_key
+
+    db = empty_db()
+    movie_ids, tv_ids = catalogue.ids(n_links)
+    for i in movie_ids:
+        db["links"][str(i)] = catalogue.link("movie", i)
+    for i in tv_ids:
+        for s in range(1, catalogue.SEASONS_PER_SERIES + 1):
+            for e in range(1, catalogue.EPISODES_PER_SEASON + 1):
+                db["links"][link_key(i, s, e)] = catalogue.link("tv", i, s, e)
+    rnd = random.Random(42)
+    for user in range(n_links // LINKS_PER_USER):
+        db["favorites"][str(user)] = [
+            {"id": str(i), "titre": catalogue.title("movie", i), "media_type": "movie",
+             "poster_path": f"/movie{i}.jpg", "year": catalogue.year(i)}
+            for i in rnd.sample(movie_ids, min(FAVORITES_PER_USER, len(movie_ids)))
+        ]
+    return db
+
+
+def prepare(n_links):
+    from storage import MemoryStore
+
+    with open("legacy.json", "w", encoding="utf-8") as f:
+        json.dump(legacy_db(n_links), f, ensure_ascii=False)
+    # Même contenu au nouveau format : migration à l'ouverture
+    os.link("legacy.json", "compact.json")
+    MemoryStore("compact.json").close()
+
+
+def load_dict():
+    """L'ancien MemoryStore : read_json_db puis index id -> saison -> épisode."""
+    from storage import parse_link_key, read_json_db
+
+    db = read_json_db("legacy.json")
+    seasons = {}
+    for key, url in db["links"].items():
+        media_id, season, episode = parse_link_key(key)
+        if season:
+            seasons.setdefault(media_id, {}).setdefault(season, {})[episode] = url
+    return db, lambda media_id, season: seasons.get(str(media_id), {}).get(season, {})
+
+
+def load_compact():
+    from storage import MemoryStore
+
+    store = MemoryStore("compact.json")
+    return store, store.get_season_links
+
+
+def measure(args):
+    from benchmarks import catalogue
+
+    loader = {"dict": load_dict, "compact": load_compact}[args.mode]
+    importlib.import_module("storage")  # Import hors mesure
+    if args.trace:
+        tracemalloc.start()
+        keep = loader()
+        print(json.dumps({"mode": args.mode, "links": args.links,
+                          "heap_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 1)}), flush=True)
+        return
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    keep, season_links = loader()
+    load_s = time.perf_counter() - start
+    rss_after = rss_mb()
+
+    _, tv_ids = catalogue.ids(args.links)
+    rnd = random.Random(42)
+    keys = [(rnd.choice(tv_ids), rnd.randint(1, catalogue.SEASONS_PER_SERIES)) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for media_id, season in keys:
+        season_links(media_id, season)
+    lookup_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+
+    files = ["legacy.json"] if args.mode == "dict" else ["compact.json", "compact.snap"]
+    print(json.dumps({
+        "mode": args.mode, "links": args.links, "load_ms": round(load_s * 1000, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+        "season_lookup_us": round(lookup_us, 2),
+        "disk_mb": round(sum(os.path.getsize(f) for f in files) / 2**20, 1),
+    }), flush=True)
+    del keep
+
+
+COLUMNS = ("mode", "links", "load_ms", "heap_mb", "rss_delta_mb", "season_lookup_us", "disk_mb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire du stockage JSON : dictionnaires contre instantané compact")
+    parser.add_argument("--links", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--json", action="store_true", help="résultats bruts (une ligne JSON par mesure)")
+    parser.add_argument("--child", choices=("prepare", *MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.links, args.mode = args.links[0], args.child
+        return prepare(args.links) if args.child == "prepare" else measure(args)
+
+    rows = []
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+    for links in args.links:
+        with tempfile.TemporaryDirectory(prefix="pathe-mem-") as tmp:
+            runs = [("prepare",)] + [(mode, *trace) for mode in MODES for trace in ((), ("--trace",))]
+            for child, *trace in runs:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.memory", "--child", child, "--links", str(links), *trace],
+                    cwd=tmp, env=env, stdout=subprocess.PIPE, check=True, text=True,
+                )
+                for line in proc.stdout.splitlines():
+                    if line.startswith("{"):
+                        if args.json:
+                            print(line, flush=True)
+                        row = json.loads(line)
+                        if trace:
+                            rows[-1].update(row)
+                        else:
+                            rows.append(row)
+    if not args.json:
+        print_table(rows, COLUMNS)
+
+
+if __name__ == "__main__":
+    main()
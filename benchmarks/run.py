@@ -0,0 +1,202 @@
+"""Benchmarks des chemins critiques du bot, sans Discord ni clé TMDB.
+
+Chaque configuration (taille du catalogue x stockage) tourne dans un
+processus séparé, dans un dossier temporaire : import du bot, mémoire et
+caches repartent de zéro.
+
+    python -m benchmarks.run --links 1000 100000 1000000 --backend sqlite json
+    python -m benchmarks.run --links 10000 --cold --tmdb-latency 0.05 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("search_local", "search_tmdb", "open_card", "change_season", "favorite", "add_season")
+
+
+def rss_mb():
+    """Mémoire résidente actuelle (Linux), sinon le pic."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+# --- Processus de mesure ---
+async def measure(args):
+    from benchmarks import catalogue
+    from benchmarks.fake_tmdb import FakeTMDB
+    from benchmarks.fakes import FakeInteraction
+
+    fake = FakeTMDB(latency=args.tmdb_latency)
+    os.environ.update(
+        TMDB_BASE_URL=await fake.start(), TMDB_API_KEY="bench", TMDB_RATE="1000000", TMDB_BURST="1000000",
+        STORAGE_BACKEND=args.backend, DB_PATH="catalogue.db",
+    )
+
+    from storage import open_store
+    store = open_store(args.backend, "db_links.json", "catalogue.db")
+    start = time.perf_counter()
+    catalogue.build(store, args.links)
+    store.close()
+    build_s = time.perf_counter() - start
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    import bot
+    bot.load_title_index()
+    emit(args, "load", load_s=round(time.perf_counter() - start, 3), build_s=round(build_s, 3),
+         rss_mb=round(rss_mb(), 1), rss_delta_mb=round(rss_mb() - rss_before, 1))
+
+    movie_ids, tv_ids = catalogue.ids(args.links)
+    rnd = random.Random(42)
+
+    def pick():
+        if movie_ids and (not tv_ids or rnd.random() < 0.5):
+            return "movie", rnd.choice(movie_ids)
+        return "tv", rnd.choice(tv_ids)
+
+    async def search_local():
+        media_type, media_id = pick()
+        modal = bot.SearchModal()
+        modal.recherche._value = catalogue.title(media_type, media_id).split()[0]
+        await modal.on_submit(FakeInteraction())
+
+    async def search_tmdb():
+        modal = bot.SearchModal()
+        modal.recherche._value = f"xq{rnd.randint(0, 10 * args.iterations)}"
+        await modal.on_submit(FakeInteraction())
+
+    async def open_card():
+        media_type, media_id = pick()
+        await bot.EmojiButton(media_type, media_id, "🧡", "bench", 0).callback(FakeInteraction())
+
+    async def change_season():
+        if not tv_ids:
+            return
+        select = bot.SeasonSelect(rnd.choice(tv_ids), None, 1, "bench", 0)
+        season = rnd.randint(1, catalogue.SEASONS_PER_SERIES)
+        await select.callback(FakeInteraction(data={"values": [str(season)]}))
+
+    async def favorite():
+        media_type, media_id = pick()
+        await bot.FavButton(media_type, media_id).callback(FakeInteraction(user_id=rnd.randint(1, 1000)))
+
+    async def add_season():
+        sid = rnd.choice(tv_ids) if tv_ids else catalogue.TV_ID_OFFSET + 1
+        season = rnd.randint(1, catalogue.SEASONS_PER_SERIES + 1)
+        links = " ".join(catalogue.link("tv", sid, season, e) for e in range(1, catalogue.EPISODES_PER_SEASON + 1))
+        await bot.add_season.callback(FakeInteraction(admin=True), str(sid), season, links)
+
+    scenarios = {f.__name__: f for f in (search_local, search_tmdb, open_card, change_season, favorite, add_season)}
+    for name in args.scenarios:
+        await run_scenario(args, name, scenarios[name], bot, fake)
+
+    await bot.tmdb.close()
+    bot.store.close()
+    await fake.stop()
+
+
+async def run_scenario(args, name, op, bot, fake):
+    async def one():
+        if args.cold:
+            for cache in (bot.tmdb.cache, bot.cards.cache, bot.pagers.cache):
+                cache.clear()
+        start = time.perf_counter()
+        await op()
+        return time.perf_counter() - start
+
+    for _ in range(min(10, args.iterations)):
+        await one()
+
+    latencies = []
+    per_worker = max(1, args.iterations // args.concurrency)
+
+    async def worker():
+        for _ in range(per_worker):
+            latencies.append(await one())
+
+    requests_before = fake.requests
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    emit(args, name, ops=len(latencies), ops_s=round(len(latencies) / elapsed, 1),
+         p50_ms=round(percentile(latencies, 0.50) * 1000, 3), p99_ms=round(percentile(latencies, 0.99) * 1000, 3),
+         tmdb_requests=fake.requests - requests_before, rss_mb=round(rss_mb(), 1),
+         peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1))
+
+
+def emit(args, scenario, **values):
+    print(json.dumps({"backend": args.backend, "links": args.links, "scenario": scenario, **values}), flush=True)
+
+
+# --- Orchestration ---
+COLUMNS = ("backend", "links", "scenario", "ops_s", "p50_ms", "p99_ms", "tmdb_requests", "rss_mb", "load_s")
+
+
+def print_table(rows, columns=COLUMNS):
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne du bot")
+    parser.add_argument("--links", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backend", nargs="+", default=["sqlite", "json"], choices=["sqlite", "json"])
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--cold", action="store_true", help="vide les caches avant chaque opération")
+    parser.add_argument("--tmdb-latency", type=float, default=0.0, help="délai simulé des réponses TMDB (s)")
+    parser.add_argument("--json", action="store_true", help="résultats bruts (une ligne JSON par mesure)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.links, args.backend = args.links[0], args.backend[0]
+        return asyncio.run(measure(args))
+
+    rows = []
+    passthrough = ["--iterations", str(args.iterations), "--concurrency", str(args.concurrency),
+                   "--tmdb-latency", str(args.tmdb_latency), "--scenarios", *args.scenarios]
+    if args.cold:
+        passthrough.append("--cold")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+    for backend in args.backend:
+        for links in args.links:
+            with tempfile.TemporaryDirectory(prefix="pathe-bench-") as tmp:
+                proc = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", "--child", "--links", str(links), "--backend", backend,
+                     *passthrough],
+                    cwd=tmp, env=env, stdout=subprocess.PIPE, check=True, text=True,
+                )
+            for line in proc.stdout.splitlines():
+                if line.startswith("{"):
+                    row = json.loads(line)
+                    rows.append(row)
+                    if args.json:
+                        print(line, flush=True)
+    if not args.json:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
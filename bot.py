@@ -1,653 +1,995 @@
+import asyncio
 import discord
-import os
-import requests
+import hashlib
 import json
-from dotenv import load_dotenv
+import math
+import os
+import re
+import time
+from collections import Counter
+from discord import app_commands
 from discord.ext import commands
-from keep_alive import keep_alive
+from browse import BrowseIndex
+from cards import CardRenderer
+import metrics
+from keep_alive import KeepAlive
+from linkcheck import LinkChecker
+from notifications import NotificationQueue
+from reports import ReportBoard
+from search import SearchPagers
+from storage import open_store
+from throttle import Throttle
+from title_index import TitleIndex, fold
+from tmdb import TMDBClient, media_meta
+from loop_watchdog import LoopWatchdog
 
-load_dotenv()
+if os.path.exists('.env'):
+    # dotenv n'est importé que s'il y a un fichier à charger
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # --- CONFIGURATION ---
-bot = commands.Bot(command_prefix="!", intents=discord.Intents.all())
 TMDB_API_KEY = os.getenv('TMDB_API_KEY')
-DB_FILE = "db_links.json"
+# Débit maximal vers TMDB (requêtes/s) et taille des rafales autorisées
+tmdb = TMDBClient(TMDB_API_KEY, rate=float(os.getenv('TMDB_RATE', 40)), burst=int(os.getenv('TMDB_BURST', 40)),
+                  base_url=os.getenv('TMDB_BASE_URL'))
+
+class PatheBot(commands.Bot):
+    async def setup_hook(self):
+        # Routage des composants persistants par custom_id
+        self.add_dynamic_items(*DYNAMIC_ITEMS)
+        self.add_view(CatalogueView())
+        throttle.banned.update(store.banned_users())
+        
+        load_title_index()
+        background(sync_commands())
+        background(persist_views())
+        background(backfill_media())
+        background(migrate_favorites())
+        notifications.start()
+        linkcheck.start()
+        reports.start()
+        await ops_server.start()
+        watchdog.start()
+        if os.getenv('ASYNCIO_DEBUG'):
+            watchdog.set_debug(True)
+    
+    async def close(self):
+        watchdog.stop()
+        await ops_server.stop()
+        await linkcheck.stop()
+        await reports.stop()
+        await notifications.stop()
+        for task in list(background_tasks):
+            task.cancel()
+        await tmdb.close()
+        await super().close()
+        flush_views()
+        await store.aclose()
+
+class GuardedTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction):
+        return await allow_interaction(interaction)
+    
+    async def on_error(self, interaction: discord.Interaction, error):
+        observe_command(interaction, failed=True)
+        await super().on_error(interaction, error)
+
+bot = PatheBot(command_prefix="!", intents=discord.Intents.all(), tree_cls=GuardedTree)
+DB_FILE = "db_links.json"  # Stockage JSON (importé dans SQLite au premier lancement)
+DB_PATH = os.getenv('DB_PATH', "catalogue.db")
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', "sqlite")  # "sqlite" ou "json"
 
 # IDs des salons
 SUGGESTION_CHANNEL_ID = 1453864717897699382
 NOTIFICATION_CHANNEL_ID = 1453864717897699380  # Salon pour les notifications d'ajout
 
 EMOJI_LIST = ["🧡", "💛", "💚", "💙", "🤍", "🟠", "🟣", "⚫", "❤️"]
+CARD_ERROR = "❌ Impossible de charger cette fiche pour le moment."
 
 # --- GESTION DB ---
-def load_db():
-    if not os.path.exists(DB_FILE): 
-        return {"links": {}, "trailers": {}, "favorites": {}, "banned_users": []}
-    with open(DB_FILE, "r", encoding='utf-8') as f:
-        try: 
-            data = json.load(f)
-            if "links" not in data: data = {"links": data, "trailers": {}, "favorites": {}, "banned_users": []}
-            if "trailers" not in data: data["trailers"] = {}
-            return data
-        except: return {"links": {}, "trailers": {}, "favorites": {}, "banned_users": []}
-
-def save_db(db):
-    with open(DB_FILE, "w", encoding='utf-8') as f: 
-        json.dump(db, f, indent=4, ensure_ascii=False)
+store = open_store(STORAGE_BACKEND, DB_FILE, DB_PATH)
 
 # --- FONCTIONS TMDB ---
-def search_tmdb(query):
-    url = f"https://api.themoviedb.org/3/search/multi"
-    params = {'api_key': TMDB_API_KEY, 'query': query, 'language': 'fr-FR'}
-    return requests.get(url, params=params).json().get('results', [])
+async def search_tmdb(query):
+    return await tmdb.search(query)
+
+async def get_details(endpoint):
+    return await tmdb.details(endpoint)
+
+# Vérification des liens en arrière-plan ; une fiche est re-rendue quand un de ses liens meurt ou revit
+linkcheck = LinkChecker(store, on_change=lambda media_id: cards.invalidate(media_id),
+                        interval=float(os.getenv('LINKCHECK_INTERVAL', 6 * 3600)))
+cards = CardRenderer(store, tmdb, health=linkcheck)
+title_index = TitleIndex()
+browse_index = BrowseIndex()  # Nouveautés, genres, décennies (sans appel TMDB)
+pagers = SearchPagers(tmdb, page_size=len(EMOJI_LIST), index=title_index)
+
+# --- ANTI-ABUS ---
+# Au plus 8 interactions par utilisateur et 120 par serveur sur 10 secondes
+throttle = Throttle(user_limit=8, user_window=10.0, guild_limit=120, guild_window=10.0)
+THROTTLE_MESSAGES = {
+    Throttle.BANNED: "⛔ Tu n'as pas accès au catalogue.",
+    Throttle.USER: "⏳ Doucement ! Réessaie dans quelques secondes.",
+    Throttle.GUILD: "⏳ Le bot est très sollicité sur ce serveur, réessaie dans quelques secondes.",
+}
+
+async def allow_interaction(interaction):
+    """Filtre commun aux commandes, composants et formulaires.
+    Un refus ne coûte au plus qu'une réponse éphémère, sans appel TMDB ni accès DB."""
+    if interaction.type is discord.InteractionType.autocomplete:
+        # Une requête par frappe, servie par l'index local : seuls les bannis sont filtrés
+        return str(interaction.user.id) not in throttle.banned
+    reason = throttle.check(interaction.user.id, interaction.guild_id)
+    if reason is None:
+        interaction.extras["started"] = time.perf_counter()
+        return True
+    if throttle.should_warn(interaction.user.id):
+        await interaction.response.send_message(THROTTLE_MESSAGES[reason], ephemeral=True)
+    return False
+
+class Guarded:
+    """À placer en premier parent des vues, composants et formulaires"""
+    async def interaction_check(self, interaction: discord.Interaction):
+        return await allow_interaction(interaction)
+
+# --- MÉTRIQUES ---
+# Blocage de la boucle signalé (avec la pile) au-delà de 250 ms
+watchdog = LoopWatchdog(threshold=float(os.getenv('LOOP_STALL_THRESHOLD', 0.25)))
+
+def timed(kind, name):
+    """Chronomètre un callback de composant ou de formulaire"""
+    return metrics.timed(metrics.INTERACTION_SECONDS, metrics.INTERACTION_ERRORS, kind=kind, name=name)
+
+def observe_command(interaction, failed=False):
+    started = interaction.extras.get("started")
+    name = interaction.command.qualified_name if interaction.command else "inconnue"
+    if started is not None:
+        metrics.INTERACTION_SECONDS.observe(time.perf_counter() - started, kind="command", name=name)
+    if failed:
+        metrics.INTERACTION_ERRORS.inc(kind="command", name=name)
+
+def cache_stats(field):
+    return [({"cache": name}, cache.stats()[field]) for name, cache in (("tmdb", tmdb.cache), ("cards", cards.cache))]
+
+def health():
+    """État pour /healthz : (en bonne santé ?, détails)"""
+    lag = metrics.LOOP_LAG.values.get((), 0.0)
+    latency = bot.latency  # nan (ou inf) tant que la passerelle n'est pas connectée
+    known = math.isfinite(latency)
+    ok = bot.is_ready() and known and latency < 5 and lag < 1
+    return ok, {
+        "ready": bot.is_ready(),
+        "gateway_latency_ms": round(latency * 1000, 1) if known else None,  # NaN n'est pas du JSON
+        "loop_lag_ms": round(lag * 1000, 1),
+        "tmdb": tmdb.breaker.state,
+    }
 
-def get_details(endpoint):
-    url = f"https://api.themoviedb.org/3/{endpoint}"
-    params = {'api_key': TMDB_API_KEY, 'language': 'fr-FR'}
-    return requests.get(url, params=params).json()
+def status():
+    """Détails pour /status"""
+    return {
+        "user": str(bot.user),
+        "guilds": len(bot.guilds),
+        "catalogue": len(title_index),
+        "tmdb": tmdb.stats(),
+        "notifications": {"sent": notifications.sent, "failed": notifications.failed, "queued": notifications.queue.qsize()},
+        "throttle_rejected": throttle.rejected,
+        "loop_stalls": watchdog.stalls,
+        "links": {"checked": linkcheck.checked, "dead": linkcheck.dead_count()},
+        "open_reports": len(reports.reports),
+        "asyncio_debug": watchdog.debug,
+    }
+
+# Serveur de supervision (/, /healthz, /metrics, /status, /cache) sur la boucle du bot
+ops_server = KeepAlive(health, status, {"tmdb": tmdb.cache, "cards": cards.cache, "search": pagers.cache},
+                        port=int(os.getenv('PORT', 8080)))
+
+metrics.gauge("pathe_cache_hit_ratio", "Taux de succès des caches", lambda: cache_stats("hit_ratio"))
+metrics.counter("pathe_cache_coalesced_total", "Appels regroupés sur un chargement déjà en cours", lambda: cache_stats("coalesced"))
+metrics.counter("pathe_tmdb_calls_total", "Appels TMDB par issue (envoyés, erreurs, limités, refusés, cache périmé)",
+                lambda: [({"outcome": k}, v) for k, v in tmdb.counters.items()])
+metrics.gauge("pathe_dead_links", "Liens considérés morts par la vérification", lambda: linkcheck.dead_count())
+metrics.counter("pathe_throttle_rejected_total", "Interactions refusées par l'anti-abus",
+                lambda: [({"reason": k}, v) for k, v in throttle.rejected.items()])
+
+# --- INDEX DES TITRES ---
+def load_title_index():
+    media = store.all_media()
+    title_index.add_many((m["media_type"], m["media_id"], m.get("title"), m.get("original_title"), m.get("year"))
+                         for m in media)
+    browse_index.add_many((m["media_type"], m["media_id"], m, m.get("added_at")) for m in media)
+
+async def in_batches(func, items, size=10):
+    """Appelle `func(*item)` par petits lots : le limiteur TMDB reste disponible
+    pour les utilisateurs et les appels d'arrière-plan ne sont pas refusés en masse"""
+    items = list(items)
+    results = []
+    for start in range(0, len(items), size):
+        results += await asyncio.gather(*(func(*item) for item in items[start:start + size]))
+    return results
+
+async def remember_media(media_type, media_id):
+    """Enregistre les métadonnées TMDB d'un média du catalogue et l'indexe.
+    Renvoie False si TMDB n'a rien renvoyé"""
+    info = await get_details(f"{media_type}/{media_id}")
+    if not info:
+        return False
+    meta = media_meta(info)
+    store.upsert_media(media_type, media_id, meta)
+    title_index.add(media_type, media_id, meta["title"], meta["original_title"], meta["year"])
+    browse_index.add(media_type, media_id, meta)
+    return True
+
+async def backfill_media():
+    """Complète en arrière-plan les métadonnées des médias ajoutés avant l'index"""
+    known = {(m["media_type"], m["media_id"]) for m in store.all_media()}
+    missing = store.linked_media() - known
+    if missing:
+        added = await in_batches(remember_media, missing)
+        print(f"📚 Index des titres : {sum(added)}/{len(missing)} média(s) ajouté(s)")
+
+# --- FAVORIS ---
+def favorite_record(media_type, media_id, info):
+    """Favori enregistré avec son type et ses métadonnées (aucun appel TMDB à l'ouverture)"""
+    meta = media_meta(info)
+    return {"id": str(media_id), "titre": meta["title"] or str(media_id), "media_type": media_type,
+            "poster_path": meta["poster_path"], "year": meta["year"]}
+
+async def resolve_favorite(media_id, titre, linked=frozenset()):
+    """Détermine le type d'un ancien favori (film ou série) et complète ses métadonnées"""
+    candidates = [t for t in ("movie", "tv") if (t, media_id) in linked] or ["movie", "tv"]
+    infos = await asyncio.gather(*(get_details(f"{t}/{media_id}") for t in candidates))
+    found = [(t, info) for t, info in zip(candidates, infos) if info]
+    if not found:
+        return None
+    # Un film et une série peuvent partager un id TMDB : on compare les titres
+    media_type, info = next(((t, i) for t, i in found if fold(media_meta(i)["title"]) == fold(titre)), found[0])
+    store.update_favorites(media_id, favorite_record(media_type, media_id, info))
+    return media_type
+
+async def migrate_favorites():
+    """Migration en arrière-plan des favoris enregistrés sans type de média"""
+    untyped = store.untyped_favorites()
+    if not untyped:
+        return
+    linked = store.linked_media()
+    resolved = await in_batches(resolve_favorite, ((i, t, linked) for i, t in untyped.items()))
+    print(f"⭐ Favoris migrés : {sum(1 for r in resolved if r)}/{len(untyped)}")
+
+favorite_tasks = set()  # Préchargements en cours (référence gardée jusqu'à leur fin)
+
+async def complete_favorites(user_id, favs):
+    """Complète en un seul lot les favoris d'une page encore sans type (type, affiche, année)"""
+    untyped = [f for f in favs if not f.get('media_type')]
+    if not untyped:
+        return favs
+    await asyncio.gather(*(resolve_favorite(f['id'], f['titre']) for f in untyped))
+    current = {f['id']: f for f in store.get_favorites(user_id)}
+    # Seuls les favoris sans type sont remplacés : un film et une série peuvent partager un id
+    return [f if f.get('media_type') else current.get(f['id'], f) for f in favs]
+
+async def warm_favorites(user_id, visible, upcoming):
+    """Précharge les fiches de la page affichée, puis complète et précharge la page suivante"""
+    upcoming = await complete_favorites(user_id, upcoming)
+    await asyncio.gather(*(cards.movie(f['id']) if f['media_type'] == "movie" else cards.season(f['id'], 1)
+                           for f in visible + upcoming if f.get('media_type')))
+
+def prefetch_favorites(user_id, visible, upcoming):
+    task = asyncio.create_task(warm_favorites(user_id, visible, upcoming))
+    favorite_tasks.add(task)
+    task.add_done_callback(favorite_tasks.discard)
+
+async def autocomplete_titles(current, media_type=None, value=None):
+    entries = title_index.search(current, limit=25, media_type=media_type) if current else []
+    return [
+        app_commands.Choice(
+            name=f"{'🎬' if e['media_type'] == 'movie' else '📺'} {e['title']}" + (f" ({e['year']})" if e['year'] else ""),
+            value=value(e) if value else e['id']
+        )
+        for e in entries
+    ]
 
 # --- FONCTION NOTIFICATION ---
-async def send_notification(media_type, media_id, user):
-    """Envoie une notification dans le salon quand un contenu est ajouté"""
-    channel = bot.get_channel(NOTIFICATION_CHANNEL_ID)
-    if not channel:
+def watch_view(media_type, media_id):
+    # Bouton "Regarder" (persistant : fonctionne encore après un redémarrage)
+    view = discord.ui.View(timeout=None)
+    view.add_item(WatchButton(media_type, media_id))
+    return view
+
+notifications = NotificationQueue(bot, NOTIFICATION_CHANNEL_ID, tmdb, watch_view)
+
+def send_notification(media_type, media_id, user):
+    """Met en file la notification d'un contenu ajouté (envoyée en arrière-plan,
+    regroupée avec les autres ajouts du moment)"""
+    notifications.put(media_type, media_id, user)
+
+# --- DÉMARRAGE ---
+PREWARM_TITLES = 50  # Titres les plus consultés préchauffés après la connexion
+view_counts = Counter()  # Ouvertures de fiches pas encore enregistrées
+prewarm_task = None
+background_tasks = set()  # Tâches de fond (référence gardée jusqu'à leur fin)
+
+def background(coro):
+    """Lance une tâche de fond : gardée référencée, son erreur éventuelle est affichée"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_done)
+    return task
+
+def background_done(task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"❌ Tâche de fond {task.get_coro().__qualname__} : {task.exception()!r}")
+
+def commands_hash():
+    payload = [c.to_dict(bot.tree) for c in bot.tree.get_commands()]
+    return hashlib.sha256(json.dumps([bot.application_id, payload], sort_keys=True, default=str).encode()).hexdigest()
+
+async def sync_commands():
+    """Synchronise les commandes avec Discord seulement si leurs définitions ont changé"""
+    digest = commands_hash()
+    if store.get_meta("commands_hash") == digest:
         return
+    await bot.tree.sync()
+    store.set_meta("commands_hash", digest)
+    print("🔄 Commandes synchronisées")
+
+def flush_views():
+    if view_counts:
+        store.add_views(dict(view_counts))
+        view_counts.clear()
+
+async def persist_views(interval=60):
+    while True:
+        await asyncio.sleep(interval)
+        flush_views()
+
+async def prewarm():
+    """Préchauffe les caches TMDB et des fiches pour les titres les plus consultés"""
+    top = store.top_media(PREWARM_TITLES)
+    await in_batches(lambda t, i: cards.movie(i) if t == "movie" else cards.season(i, 1), top)
+    if top:
+        print(f"🔥 Caches préchauffés : {len(top)} titre(s)")
+
+# --- FICHES ---
+async def media_title(media_type, media_id):
+    info = await get_details(f"{media_type}/{media_id}")
+    return info.get('title') or info.get('name') or str(media_id)
+
+# Signalements regroupés : un message récapitulatif par élément, mis à jour toutes les 30 s
+reports = ReportBoard(bot, SUGGESTION_CHANNEL_ID, store, media_title, interval=30.0)
+
+def movie_view(card, media_id, query=None, page=0):
+    """Vue d'une fiche film. `query`/`page` : recherche d'origine (ajoute le bouton retour)"""
+    view = discord.ui.View(timeout=None)
+    row = 0
+    if query:
+        view.add_item(BackButton(query, page, row=row))
+        row += 1
+    
+    if card.lien:
+        label, emoji = ("Lecture (lien peut-être mort)", "⚠️") if card.lien_mort else ("Lecture", "🔗")
+        view.add_item(discord.ui.Button(label=label, emoji=emoji, url=card.lien, style=discord.ButtonStyle.link, row=row))
+    
+    if card.trailer:
+        view.add_item(discord.ui.Button(label="Bande d'annonce", emoji="🔗", url=card.trailer, style=discord.ButtonStyle.link, row=row))
+    
+    view.add_item(ReportButton("movie", media_id, 0, row=row + 1))
+    view.add_item(FavButton("movie", media_id, row=row + 1))
+    return view
+
+def serie_view(card, sid, season_num, query=None, page=0):
+    """Vue d'une fiche série. `query`/`page` : recherche d'origine (ajoute le bouton retour)"""
+    view = discord.ui.View(timeout=None)
+    if query:
+        view.add_item(BackButton(query, page, row=0))
+    view.add_item(ReportButton("tv", sid, season_num, row=0))
+    view.add_item(FavButton("tv", sid, row=0))
+    if card.trailer:
+        view.add_item(discord.ui.Button(label="Bande d'annonce", emoji="🔗", url=card.trailer, style=discord.ButtonStyle.link, row=0))
+    
+    options = [discord.SelectOption(label=f"Saison {n}", value=str(n), default=(str(n) == str(season_num)))
+               for n in card.seasons][:25]
+    if options:
+        view.add_item(SeasonSelect(sid, options, season_num, query, page, row=1))
+    return view
+
+async def show_card(interaction, media_type, media_id, season_num=1, query=None, page=0, edit=True):
+    """Affiche la fiche d'un film ou d'une saison de série"""
+    if media_type == "movie":
+        card = await cards.movie(media_id)
+    else:
+        card = await cards.season(media_id, season_num)
     
-    # Récupérer les infos du média
-    info = get_details(f"{media_type}/{media_id}")
-    titre = info.get('title') or info.get('name')
-    
-    embed = discord.Embed(
-        title=f"{'🎬' if media_type == 'movie' else '📺'} Nouveau contenu ajouté !",
-        description=f"**{titre}**",
-        color=0x00ff00
-    )
-    
-    # Synopsis court
-    synopsis = info.get('overview', 'Aucun synopsis disponible')[:200]
-    embed.add_field(name="Synopsis", value=synopsis + "...", inline=False)
-    
-    # Affiche
-    if info.get('poster_path'):
-        embed.set_thumbnail(url=f"https://image.tmdb.org/t/p/w500{info['poster_path']}")
-    
-    embed.add_field(name="Type", value="Film 🎬" if media_type == "movie" else "Série 📺", inline=True)
-    embed.add_field(name="ID TMDB", value=media_id, inline=True)
-    embed.set_footer(text=f"Ajouté par {user.name}")
-    
-    # Bouton "Regarder"
-    view = discord.ui.View()
-    btn_watch = discord.ui.Button(label="Regarder", style=discord.ButtonStyle.primary, emoji="👁️")
-    
-    async def watch_callback(i):
-        await show_media_from_notification(i, media_type, media_id)
+    if card is None:
+        return await interaction.response.send_message(CARD_ERROR, ephemeral=True)
+    view_counts[(media_type, str(media_id))] += 1
     
-    btn_watch.callback = watch_callback
-    view.add_item(btn_watch)
+    if media_type == "movie":
+        view = movie_view(card, media_id, query, page)
+    else:
+        view = serie_view(card, media_id, season_num, query, page)
     
-    await channel.send(embed=embed, view=view)
+    if edit:
+        await interaction.response.edit_message(content=None, embed=card.embed(), view=view)
+    else:
+        await interaction.response.send_message(embed=card.embed(), view=view, ephemeral=True)
 
 async def show_media_from_notification(interaction, media_type, media_id):
     """Affiche la fiche complète du film/série depuis la notification"""
-    info = get_details(f"{media_type}/{media_id}")
-    titre = info.get('title') or info.get('name')
-    
-    if media_type == "movie":
-        # FILM
-        embed = discord.Embed(title=titre, color=0x2b2d31)
-        
-        genres = ", ".join([g['name'] for g in info.get('genres', [])])
-        embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-        
-        date_sortie = info.get('release_date', 'Inconnue')[:4]
-        embed.add_field(name="Date de sortie:", value=date_sortie, inline=False)
-        
-        embed.add_field(name="Synopsis:", value=info.get('overview', 'Non spécifié')[:500], inline=False)
-        
-        if info.get('poster_path'):
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500{info['poster_path']}")
-        
-        embed.set_footer(text=f"ID TMDB: {media_id}")
-        
-        view = discord.ui.View()
-        
-        db = load_db()
-        lien = db["links"].get(str(media_id))
-        trailer = db["trailers"].get(str(media_id))
-        
-        if lien:
-            view.add_item(discord.ui.Button(label="Lecture", emoji="🔗", url=lien, style=discord.ButtonStyle.link, row=0))
-        
-        if trailer:
-            view.add_item(discord.ui.Button(label="Bande d'annonce", emoji="🔗", url=trailer, style=discord.ButtonStyle.link, row=0))
-        
-        btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=1)
-        
-        async def report_cb(i):
-            chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-            if chan:
-                await chan.send(f"🚩 **Signalement** : {titre} (ID: {media_id})")
-            await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
-        
-        btn_report.callback = report_cb
-        view.add_item(btn_report)
-        
-        view.add_item(FavButton(media_id, titre, row=1))
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-        
-    else:
-        # SÉRIE
-        embed = discord.Embed(title=f"{titre} - Saison 1", color=0x2b2d31)
-        
-        genres = ", ".join([g['name'] for g in info.get('genres', [])])
-        embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-        embed.add_field(name="Date de sortie:", value=info.get('first_air_date', 'Inconnue')[:4], inline=False)
-        
-        embed.add_field(name="Synopsis:", value=info.get('overview', 'Non spécifié')[:300], inline=False)
-        
-        season_data = get_details(f"tv/{media_id}/season/1")
-        
-        db = load_db()
-        episodes_text = "**Épisodes:**\n"
-        for e in season_data.get('episodes', []):
-            cle = f"{media_id}_S1_E{e['episode_number']}"
-            lien = db["links"].get(cle)
-            if lien:
-                episodes_text += f"[Episode {e['episode_number']}]({lien})\n"
-            else:
-                episodes_text += f"Episode {e['episode_number']}\n"
-        
-        embed.add_field(name="", value=episodes_text, inline=False)
-        
-        if season_data.get('poster_path'):
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500{season_data['poster_path']}")
-        
-        embed.set_footer(text=f"ID TMDB: {media_id}")
-        
-        view = discord.ui.View()
-        
-        btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=0)
-        
-        async def report_cb(i):
-            chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-            if chan:
-                await chan.send(f"🚩 **Signalement** : {titre} - Saison 1 (ID: {media_id})")
-            await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
-        
-        btn_report.callback = report_cb
-        view.add_item(btn_report)
-        
-        view.add_item(FavButton(media_id, titre, row=0))
-        
-        seasons = info.get('seasons', [])
-        if seasons:
-            options = [discord.SelectOption(label=f"Saison {s['season_number']}", value=str(s['season_number'])) 
-                       for s in seasons if s['season_number'] > 0][:25]
-            
-            if options:
-                select = discord.ui.Select(placeholder="Saison 1", options=options, row=1)
-                
-                async def change_season_cb(i):
-                    await change_season_from_fav(i, media_id, info, select.values[0])
-                
-                select.callback = change_season_cb
-                view.add_item(select)
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    await show_card(interaction, media_type, media_id, edit=False)
 
-async def change_season_from_fav(interaction, sid, info_serie, season_num):
-    """Changement de saison depuis favoris ou notification"""
-    titre = info_serie.get('name')
-    season_data = get_details(f"tv/{sid}/season/{season_num}")
-    
-    embed = discord.Embed(title=f"{titre} - Saison {season_num}", color=0x2b2d31)
-    
-    genres = ", ".join([g['name'] for g in info_serie.get('genres', [])])
-    embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-    embed.add_field(name="Date de sortie:", value=season_data.get('air_date', 'Inconnue')[:4], inline=False)
-    
-    embed.add_field(name="Synopsis:", value=season_data.get('overview') or info_serie.get('overview', 'Non spécifié')[:300], inline=False)
+@metrics.timed(metrics.OPERATION_SECONDS, op="search")
+async def search_results(query, page=0):
+    """Embed et vue d'une page de résultats (-1 : dernière page), ou None si aucun résultat"""
+    pager = pagers.get(query)
+    valid, page = await pager.page(page)
+    if not valid:
+        return None
+    # La page suivante se charge pendant que l'utilisateur lit celle-ci
+    pager.prefetch(page + 1)
     
-    db = load_db()
-    episodes_text = "**Épisodes:**\n"
-    for e in season_data.get('episodes', []):
-        cle = f"{sid}_S{season_num}_E{e['episode_number']}"
-        lien = db["links"].get(cle)
-        if lien:
-            episodes_text += f"[Episode {e['episode_number']}]({lien})\n"
-        else:
-            episodes_text += f"Episode {e['episode_number']}\n"
-    
-    embed.add_field(name="", value=episodes_text, inline=False)
+    embed = discord.Embed(
+        title=f"🔎 Résultat de la Recherche \"{query}\"",
+        description="**Pour accéder à votre Recherche, cliquez sur l'emoji correspondant.**",
+        color=0x2b2d31
+    )
     
-    if season_data.get('poster_path'):
-        embed.set_image(url=f"https://image.tmdb.org/t/p/w500{season_data['poster_path']}")
+    result_text = ""
+    for i, r in enumerate(valid):
+        result_text += f"{EMOJI_LIST[i]} {r.get('title') or r.get('name')}\n"
     
-    embed.set_footer(text=f"ID TMDB: {sid}")
+    embed.add_field(name="", value=result_text, inline=False)
+    total = pager.estimated_total()
+    embed.set_footer(text=f"Page {page + 1}/{pager.page_count()} - Total de {'' if pager.exhausted else '~'}{total} résultat(s)")
     
-    view = discord.ui.View()
+    return embed, ResultView(valid, query, page, last=pager.exhausted and page == pager.page_count() - 1)
+
+BROWSE_TITLES = {"recent": "🆕 Nouveautés", "genre": "🎭 {}", "year": "📅 Années {}"}
+
+def browse_page(kind, value="", page=0):
+    """Embed et vue d'une page de navigation (-1 : dernière page), ou None si elle est vide"""
+    entries, page, pages = browse_index.page(kind, value, page, len(EMOJI_LIST))
+    if not entries:
+        return None
     
-    btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=0)
+    embed = discord.Embed(
+        title=BROWSE_TITLES[kind].format(value),
+        description="**Pour ouvrir une fiche, cliquez sur l'emoji correspondant.**",
+        color=0x2b2d31
+    )
     
-    async def report_cb(i):
-        chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-        if chan:
-            await chan.send(f"🚩 **Signalement** : {titre} - Saison {season_num} (ID: {sid})")
-        await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
+    result_text = ""
+    for i, e in enumerate(entries):
+        result_text += f"{EMOJI_LIST[i]} {e['title']}" + (f" ({e['year']})" if e['year'] else "") + "\n"
     
-    btn_report.callback = report_cb
-    view.add_item(btn_report)
+    embed.add_field(name="", value=result_text, inline=False)
+    embed.set_footer(text=f"Page {page + 1}/{pages} - Total de {browse_index.count(kind, value)} résultat(s)")
     
-    view.add_item(FavButton(sid, titre, row=0))
+    return embed, BrowseView(entries, kind, value, page, last=page == pages - 1)
+
+def browse_menu(kind):
+    """Choix du genre ou de la décennie à parcourir, ou None si le catalogue est vide"""
+    if kind == "genre":
+        options = [discord.SelectOption(label=g, value=g, description=f"{n} titre(s)") for g, n in browse_index.genres()]
+    else:
+        options = [discord.SelectOption(label=f"Années {d}", value=d, description=f"{n} titre(s)") for d, n in browse_index.decades()]
+    if not options:
+        return None
+    view = discord.ui.View(timeout=None)
+    view.add_item(BrowseSelect(kind, options))
+    return view
+
+@metrics.timed(metrics.OPERATION_SECONDS, op="favorites")
+async def favorites_page(user_id, page=0):
+    """Embed et vue d'une page de favoris (-1 : dernière page), ou None si la liste est vide"""
+    favs = store.get_favorites(user_id)
+    if not favs:
+        return None
+    size = len(EMOJI_LIST)
+    pages = math.ceil(len(favs) / size)
+    page = pages - 1 if page < 0 else max(0, min(page, pages - 1))
+    visible = await complete_favorites(user_id, favs[page * size:(page + 1) * size])
+    # Fiches de cette page et de la suivante chargées pendant que l'utilisateur lit celle-ci
+    prefetch_favorites(user_id, visible, favs[(page + 1) * size:(page + 2) * size])
+    
+    embed_fav = discord.Embed(
+        title="❤️ Mes Favoris",
+        color=0x2b2d31
+    )
     
-    seasons = info_serie.get('seasons', [])
-    options = [discord.SelectOption(label=f"Saison {s['season_number']}", value=str(s['season_number']), default=(str(s['season_number'])==season_num)) 
-               for s in seasons if s['season_number'] > 0][:25]
+    fav_text = ""
+    for idx, f in enumerate(visible):
+        fav_text += f"{EMOJI_LIST[idx]} {f['titre']}" + (f" ({f['year']})" if f.get('year') else "") + "\n"
     
-    if options:
-        select = discord.ui.Select(placeholder=f"Saison {season_num}", options=options, row=1)
-        
-        async def change_cb(i):
-            await change_season_from_fav(i, sid, info_serie, select.values[0])
-        
-        select.callback = change_cb
-        view.add_item(select)
+    embed_fav.add_field(name="", value=fav_text, inline=False)
+    embed_fav.set_footer(text=f"Page {page + 1}/{pages} - Total de {len(favs)} résultat(s)")
     
-    await interaction.response.edit_message(embed=embed, view=view)
+    return embed_fav, FavoritesView(visible, page, last=page == pages - 1)
 
 # --- VUES ---
+# Les boutons des fiches sont des DynamicItem : l'état (type, id, saison,
+# recherche) est encodé dans le custom_id et décodé par `from_custom_id`.
+# Aucune vue n'est gardée en mémoire par message et les boutons continuent
+# de fonctionner après un redémarrage.
 
-class FavoritesView(discord.ui.View):
-    """Vue pour afficher les favoris avec des cœurs cliquables"""
-    def __init__(self, favorites):
-        super().__init__(timeout=180)
-        self.favorites = favorites
+QUERY_MAX_LEN = 60  # Garde les custom_id sous la limite de 100 caractères
+
+class WatchButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"watch:(?P<type>movie|tv):(?P<id>\d+)"):
+    """Bouton « Regarder » des notifications"""
+    def __init__(self, media_type, media_id):
+        super().__init__(discord.ui.Button(
+            label="Regarder", style=discord.ButtonStyle.primary, emoji="👁️",
+            custom_id=f"watch:{media_type}:{media_id}"
+        ))
+        self.media_type, self.media_id = media_type, str(media_id)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"])
+    
+    @timed("component", "watch")
+    async def callback(self, interaction: discord.Interaction):
+        await show_media_from_notification(interaction, self.media_type, self.media_id)
+
+class ReportButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"report:(?P<type>movie|tv):(?P<id>\d+):(?P<season>\d+)"):
+    """Bouton « Signaler un lien » d'une fiche (saison 0 pour un film)"""
+    def __init__(self, media_type, media_id, season, row=0):
+        super().__init__(discord.ui.Button(
+            label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=row,
+            custom_id=f"report:{media_type}:{media_id}:{season}"
+        ))
+        self.media_type, self.media_id, self.season = media_type, str(media_id), int(season)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"], match["season"])
+    
+    @timed("component", "report")
+    async def callback(self, interaction: discord.Interaction):
+        # Compté en mémoire : le récapitulatif du salon staff est publié en arrière-plan
+        if not reports.add(self.media_type, self.media_id, self.season, interaction.user.id):
+            return await interaction.response.send_message("✅ Déjà signalé, merci ! Le staff est prévenu.", ephemeral=True)
+        
+        await interaction.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
+        # Les liens signalés sont revérifiés tout de suite
+        if self.season:
+            urls = store.get_season_links(self.media_id, self.season).values()
+        else:
+            urls = [store.get_link(self.media_id), store.get_trailer(self.media_id)]
+        linkcheck.report(self.media_id, urls)
+
+class FavButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"fav:(?P<type>movie|tv):(?P<id>\d+)"):
+    def __init__(self, media_type, m_id, row=0):
+        super().__init__(discord.ui.Button(
+            label="Favoris", style=discord.ButtonStyle.secondary, emoji="🤍", row=row,
+            custom_id=f"fav:{media_type}:{m_id}"
+        ))
+        self.media_type, self.m_id = media_type, str(m_id)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"])
+
+    @timed("component", "favorite")
+    async def callback(self, interaction: discord.Interaction):
+        info = await get_details(f"{self.media_type}/{self.m_id}")
+        if not store.toggle_favorite(interaction.user.id, favorite_record(self.media_type, self.m_id, info)):
+            return await interaction.response.send_message(f"💔 Retiré des favoris.", ephemeral=True)
         
-        for i, fav in enumerate(favorites[:len(EMOJI_LIST)]):
-            self.add_item(FavEmojiButton(fav, EMOJI_LIST[i], row=i//3))
+        await interaction.response.send_message(f"❤️ Ajouté aux favoris !", ephemeral=True)
 
-class FavEmojiButton(discord.ui.Button):
-    """Bouton cœur pour les favoris"""
-    def __init__(self, fav, emoji, row):
-        super().__init__(emoji=emoji, style=discord.ButtonStyle.secondary, row=row)
-        self.fav = fav
-    
+class SeasonSelect(Guarded, discord.ui.DynamicItem[discord.ui.Select], template=r"season:(?P<id>\d+)(?::(?P<page>\d+):(?P<query>.+))?"):
+    """Choix de la saison d'une série"""
+    def __init__(self, sid, options, season_num, query=None, page=0, row=1):
+        custom_id = f"season:{sid}:{page}:{query}" if query else f"season:{sid}"
+        super().__init__(discord.ui.Select(
+            placeholder=f"Saison {season_num}", options=options or [], row=row, custom_id=custom_id
+        ))
+        self.sid, self.query, self.page = str(sid), query, int(page)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["id"], None, 1, match["query"], match["page"] or 0)
+    
+    @timed("component", "season")
+    async def callback(self, interaction: discord.Interaction):
+        await show_card(interaction, "tv", self.sid, interaction.data["values"][0], self.query, self.page)
+
+class BackButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"back:(?P<page>\d+):(?P<query>.+)"):
+    """Retour à la page de résultats de la recherche"""
+    def __init__(self, query, page, row=0):
+        super().__init__(discord.ui.Button(
+            emoji="⬅️", style=discord.ButtonStyle.primary, row=row, custom_id=f"back:{page}:{query}"
+        ))
+        self.query, self.page = query, int(page)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["query"], match["page"])
+    
+    @timed("component", "back")
     async def callback(self, interaction: discord.Interaction):
-        # Déterminer si c'est un film ou une série
-        results = search_tmdb(self.fav['titre'])
-        media_type = "movie"
-        media_id = self.fav['id']
+        # Recherche expirée du cache : les pages TMDB jusqu'à la page N sont rechargées,
+        # on accuse réception d'abord (délai de 3 s de Discord)
+        await interaction.response.defer()
+        page = await search_results(self.query, self.page)
+        if page is None:
+            return await interaction.followup.send("❌ Aucun résultat trouvé.", ephemeral=True)
+        embed, view = page
+        await interaction.edit_original_response(content=None, embed=embed, view=view)
+
+class FavoritesView(discord.ui.View):
+    """Vue d'une page de favoris : cœurs cliquables et navigation entre les pages"""
+    def __init__(self, favorites, page=0, last=True):
+        super().__init__(timeout=None)
         
-        for r in results:
-            if str(r['id']) == str(media_id):
-                media_type = r['media_type']
-                break
+        for i, fav in enumerate(favorites[:len(EMOJI_LIST)]):
+            self.add_item(FavEmojiButton(fav.get('media_type'), fav['id'], EMOJI_LIST[i], row=i//3))
         
-        await show_media_from_notification(interaction, media_type, media_id)
+        if page > 0 or not last:
+            self.add_item(FavNavButton("⏮️", "first", page, disabled=page == 0))
+            self.add_item(FavNavButton("◀️", "prev", page, disabled=page == 0))
+            self.add_item(FavNavButton("▶️", "next", page, disabled=last))
+            self.add_item(FavNavButton("⏭️", "last", page, disabled=last))
+
+class FavNavButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"favnav:(?P<action>\w+):(?P<page>\d+)"):
+    """Navigation entre les pages de favoris"""
+    def __init__(self, emoji, action, page, disabled=False, row=3):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.primary, row=row, disabled=disabled,
+            custom_id=f"favnav:{action}:{page}"
+        ))
+        self.action, self.page = action, int(page)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(item.emoji, match["action"], match["page"])
+    
+    @timed("component", "favorites_nav")
+    async def callback(self, interaction: discord.Interaction):
+        target = {"first": 0, "prev": self.page - 1, "next": self.page + 1, "last": -1}[self.action]
+        page = await favorites_page(interaction.user.id, target)
+        if page is None:
+            return await interaction.response.edit_message(content="❌ Ta liste de favoris est vide.", embed=None, view=None)
+        embed, view = page
+        await interaction.response.edit_message(content=None, embed=embed, view=view)
+
+class FavEmojiButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"favopen:(?P<type>movie|tv|x):(?P<id>\d+)"):
+    """Bouton cœur pour les favoris (type "x" : ancien favori pas encore migré)"""
+    def __init__(self, media_type, media_id, emoji, row=0):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.secondary, row=row,
+            custom_id=f"favopen:{media_type or 'x'}:{media_id}"
+        ))
+        self.media_type, self.media_id = media_type if media_type != "x" else None, str(media_id)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"], item.emoji)
+    
+    @timed("component", "favorite_open")
+    async def callback(self, interaction: discord.Interaction):
+        media_type = self.media_type
+        if media_type is None:
+            fav = next((f for f in store.get_favorites(interaction.user.id) if f['id'] == self.media_id), None)
+            if fav is None:
+                return await interaction.response.send_message("❌ Ce favori n'existe plus.", ephemeral=True)
+            media_type = fav.get('media_type') or await resolve_favorite(self.media_id, fav['titre']) or "movie"
+        
+        await show_media_from_notification(interaction, media_type, self.media_id)
 
 class ResultView(discord.ui.View):
     """Vue des résultats de recherche avec embed noir et cœurs colorés"""
-    def __init__(self, results, query):
-        super().__init__(timeout=180)
-        self.results = results
-        self.query = query
-        self.current_page = 0
+    def __init__(self, results, query, page, last):
+        super().__init__(timeout=None)
         
         for i, res in enumerate(results[:len(EMOJI_LIST)]):
-            self.add_item(EmojiButton(res, EMOJI_LIST[i], results, query, row=i//3))
+            self.add_item(EmojiButton(res['media_type'], res['id'], EMOJI_LIST[i], query, page, row=i//3))
         
-        self.add_item(NavButton("⏮️", "first", row=3))
-        self.add_item(NavButton("◀️", "prev", row=3))
-        self.add_item(NavButton("🏠", "home", row=3))
-        self.add_item(NavButton("▶️", "next", row=3))
-        self.add_item(NavButton("⏭️", "last", row=3))
+        self.add_item(NavButton("⏮️", "first", page, query, disabled=page == 0))
+        self.add_item(NavButton("◀️", "prev", page, query, disabled=page == 0))
+        self.add_item(NavButton("🏠", "home", page, query))
+        self.add_item(NavButton("▶️", "next", page, query, disabled=last))
+        self.add_item(NavButton("⏭️", "last", page, query, disabled=last))
 
-class NavButton(discord.ui.Button):
-    def __init__(self, emoji, action, row):
-        super().__init__(emoji=emoji, style=discord.ButtonStyle.primary, row=row)
-        self.action = action
-    
+class NavButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"nav:(?P<action>\w+):(?P<page>\d+):(?P<query>.+)"):
+    """Navigation entre les pages de résultats ; 🏠 ramène au panneau du catalogue"""
+    def __init__(self, emoji, action, page, query, disabled=False, row=3):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.primary, row=row, disabled=disabled,
+            custom_id=f"nav:{action}:{page}:{query}"
+        ))
+        self.action, self.page, self.query = action, int(page), query
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(item.emoji, match["action"], match["page"], match["query"])
+    
+    @timed("component", "nav")
     async def callback(self, interaction: discord.Interaction):
+        if self.action == "home":
+            return await interaction.response.edit_message(content=None, embed=catalogue_embed(), view=CatalogueView())
+        
+        target = {"first": 0, "prev": self.page - 1, "next": self.page + 1, "last": -1}[self.action]
+        # La page peut demander des appels TMDB (toutes les pages pour « dernière ») :
+        # on accuse réception d'abord pour ne pas dépasser les 3 s accordées par Discord
         await interaction.response.defer()
+        page = await search_results(self.query, target)
+        if page is None:
+            return
+        embed, view = page
+        await interaction.edit_original_response(content=None, embed=embed, view=view)
 
-class EmojiButton(discord.ui.Button):
-    def __init__(self, res, emoji, all_results, query, row):
-        super().__init__(emoji=emoji, style=discord.ButtonStyle.secondary, row=row)
-        self.res = res
-        self.all_results = all_results
-        self.query = query
+class EmojiButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"open:(?P<type>movie|tv):(?P<id>\d+):(?P<page>\d+):(?P<query>.+)"):
+    def __init__(self, media_type, media_id, emoji, query, page, row=0):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.secondary, row=row,
+            custom_id=f"open:{media_type}:{media_id}:{page}:{query}"
+        ))
+        self.media_type, self.media_id, self.query, self.page = media_type, str(media_id), query, int(page)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"], item.emoji, match["query"], match["page"])
 
+    @timed("component", "open")
     async def callback(self, interaction: discord.Interaction):
-        m_type, m_id = self.res['media_type'], self.res['id']
-        info = get_details(f"{m_type}/{m_id}")
-        titre = info.get('title') or info.get('name')
-        
-        if m_type == "movie":
-            embed = discord.Embed(title=titre, color=0x2b2d31)
-            
-            genres = ", ".join([g['name'] for g in info.get('genres', [])])
-            embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-            
-            date_sortie = info.get('release_date', 'Inconnue')[:4]
-            embed.add_field(name="Date de sortie:", value=date_sortie, inline=False)
-            
-            embed.add_field(name="Synopsis:", value=info.get('overview', 'Non spécifié')[:500], inline=False)
-            
-            if info.get('poster_path'):
-                embed.set_image(url=f"https://image.tmdb.org/t/p/w500{info['poster_path']}")
-            
-            embed.set_footer(text=f"ID TMDB: {m_id}")
-            
-            view = discord.ui.View()
-            
-            btn_back = discord.ui.Button(emoji="⬅️", style=discord.ButtonStyle.primary, row=0)
-            
-            async def back_cb(i):
-                await self.show_search_results(i)
-            
-            btn_back.callback = back_cb
-            view.add_item(btn_back)
-            
-            db = load_db()
-            lien = db["links"].get(str(m_id))
-            trailer = db["trailers"].get(str(m_id))
-            
-            if lien:
-                view.add_item(discord.ui.Button(label="Lecture", emoji="🔗", url=lien, style=discord.ButtonStyle.link, row=1))
-            
-            if trailer:
-                view.add_item(discord.ui.Button(label="Bande d'annonce", emoji="🔗", url=trailer, style=discord.ButtonStyle.link, row=1))
-            
-            btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=2)
-            
-            async def report_cb(i):
-                chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-                if chan:
-                    await chan.send(f"🚩 **Signalement** : {titre} (ID: {m_id})")
-                await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
-            
-            btn_report.callback = report_cb
-            view.add_item(btn_report)
-            
-            view.add_item(FavButton(m_id, titre, row=2))
-            
-            await interaction.response.edit_message(content=None, embed=embed, view=view)
-            
-        else:
-            await self.show_serie_main(interaction, info, m_id)
+        await show_card(interaction, self.media_type, self.media_id, query=self.query, page=self.page)
 
-    async def show_search_results(self, interaction):
-        embed = discord.Embed(
-            title=f"🔎 Résultat de la Recherche \"{self.query}\"",
-            description="**Pour accéder à votre Recherche, cliquez sur l'emoji correspondant.**",
-            color=0x2b2d31
-        )
-        
-        result_text = ""
-        for idx, r in enumerate(self.all_results[:len(EMOJI_LIST)]):
-            result_text += f"{EMOJI_LIST[idx]} {r.get('title') or r.get('name')}\n"
-        
-        embed.add_field(name="", value=result_text, inline=False)
-        embed.set_footer(text=f"Page 1/1 - Total de {len(self.all_results)} résultat(s)")
-        
-        await interaction.response.edit_message(content=None, embed=embed, view=ResultView(self.all_results, self.query))
+class BrowseView(discord.ui.View):
+    """Vue d'une page de navigation : les fiches s'ouvrent dans un nouveau message"""
+    def __init__(self, entries, kind, value, page, last):
+        super().__init__(timeout=None)
+        
+        for i, e in enumerate(entries[:len(EMOJI_LIST)]):
+            self.add_item(BrowseOpenButton(e['media_type'], e['id'], EMOJI_LIST[i], row=i//3))
+        
+        self.add_item(BrowseNavButton("⏮️", "first", page, kind, value, disabled=page == 0))
+        self.add_item(BrowseNavButton("◀️", "prev", page, kind, value, disabled=page == 0))
+        self.add_item(BrowseNavButton("🏠", "home", page, kind, value))
+        self.add_item(BrowseNavButton("▶️", "next", page, kind, value, disabled=last))
+        self.add_item(BrowseNavButton("⏭️", "last", page, kind, value, disabled=last))
 
-    async def show_serie_main(self, interaction, info, sid):
-        titre = info.get('name')
-        
-        embed = discord.Embed(title=f"{titre} - Saison 1", color=0x2b2d31)
-        
-        genres = ", ".join([g['name'] for g in info.get('genres', [])])
-        embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-        embed.add_field(name="Date de sortie:", value=info.get('first_air_date', 'Inconnue')[:4], inline=False)
-        
-        embed.add_field(name="Synopsis:", value=info.get('overview', 'Non spécifié')[:300], inline=False)
-        
-        season_data = get_details(f"tv/{sid}/season/1")
-        
-        db = load_db()
-        episodes_text = "**Épisodes:**\n"
-        for e in season_data.get('episodes', []):
-            cle = f"{sid}_S1_E{e['episode_number']}"
-            lien = db["links"].get(cle)
-            if lien:
-                episodes_text += f"[Episode {e['episode_number']}]({lien})\n"
-            else:
-                episodes_text += f"Episode {e['episode_number']}\n"
-        
-        embed.add_field(name="", value=episodes_text, inline=False)
-        
-        if season_data.get('poster_path'):
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500{season_data['poster_path']}")
-        
-        embed.set_footer(text=f"ID TMDB: {sid}")
-        
-        view = discord.ui.View()
-        
-        btn_back = discord.ui.Button(emoji="⬅️", style=discord.ButtonStyle.primary, row=0)
-        
-        async def back_cb(i):
-            await self.show_search_results(i)
-        
-        btn_back.callback = back_cb
-        view.add_item(btn_back)
-        
-        btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=0)
-        
-        async def report_cb(i):
-            chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-            if chan:
-                await chan.send(f"🚩 **Signalement** : {titre} - Saison 1 (ID: {sid})")
-            await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
-        
-        btn_report.callback = report_cb
-        view.add_item(btn_report)
-        
-        view.add_item(FavButton(sid, titre, row=0))
-        
-        seasons = info.get('seasons', [])
-        if seasons:
-            options = [discord.SelectOption(label=f"Saison {s['season_number']}", value=str(s['season_number'])) 
-                       for s in seasons if s['season_number'] > 0][:25]
-            
-            if options:
-                select = discord.ui.Select(placeholder="Saison 1", options=options, row=1)
-                select.callback = lambda i: self.change_season(i, sid, info, select.values[0])
-                view.add_item(select)
-        
+class BrowseSelect(Guarded, discord.ui.DynamicItem[discord.ui.Select], template=r"browse:(?P<kind>genre|year)"):
+    """Choix du genre ou de la décennie à parcourir"""
+    def __init__(self, kind, options=None):
+        super().__init__(discord.ui.Select(
+            placeholder="Choisis un genre" if kind == "genre" else "Choisis une décennie",
+            options=options or [], custom_id=f"browse:{kind}"
+        ))
+        self.kind = kind
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["kind"])
+    
+    @timed("component", "browse_select")
+    async def callback(self, interaction: discord.Interaction):
+        page = browse_page(self.kind, interaction.data["values"][0])
+        if page is None:
+            return await interaction.response.send_message("❌ Aucun titre pour ce choix.", ephemeral=True)
+        embed, view = page
         await interaction.response.edit_message(content=None, embed=embed, view=view)
 
-    async def change_season(self, interaction, sid, info_serie, season_num):
-        titre = info_serie.get('name')
-        season_data = get_details(f"tv/{sid}/season/{season_num}")
-        
-        embed = discord.Embed(title=f"{titre} - Saison {season_num}", color=0x2b2d31)
-        
-        genres = ", ".join([g['name'] for g in info_serie.get('genres', [])])
-        embed.add_field(name="Genres:", value=genres or "Non spécifié", inline=False)
-        embed.add_field(name="Date de sortie:", value=season_data.get('air_date', 'Inconnue')[:4], inline=False)
-        
-        embed.add_field(name="Synopsis:", value=season_data.get('overview') or info_serie.get('overview', 'Non spécifié')[:300], inline=False)
-        
-        db = load_db()
-        episodes_text = "**Épisodes:**\n"
-        for e in season_data.get('episodes', []):
-            cle = f"{sid}_S{season_num}_E{e['episode_number']}"
-            lien = db["links"].get(cle)
-            if lien:
-                episodes_text += f"[Episode {e['episode_number']}]({lien})\n"
-            else:
-                episodes_text += f"Episode {e['episode_number']}\n"
-        
-        embed.add_field(name="", value=episodes_text, inline=False)
-        
-        if season_data.get('poster_path'):
-            embed.set_image(url=f"https://image.tmdb.org/t/p/w500{season_data['poster_path']}")
-        
-        embed.set_footer(text=f"ID TMDB: {sid}")
-        
-        view = discord.ui.View()
-        
-        btn_back = discord.ui.Button(emoji="⬅️", style=discord.ButtonStyle.primary, row=0)
-        
-        async def back_cb(i):
-            await self.show_search_results(i)
-        
-        btn_back.callback = back_cb
-        view.add_item(btn_back)
-        
-        btn_report = discord.ui.Button(label="Signaler un lien", emoji="🚩", style=discord.ButtonStyle.danger, row=0)
-        
-        async def report_cb(i):
-            chan = bot.get_channel(SUGGESTION_CHANNEL_ID)
-            if chan:
-                await chan.send(f"🚩 **Signalement** : {titre} - Saison {season_num} (ID: {sid})")
-            await i.response.send_message("✅ Merci, le staff va vérifier !", ephemeral=True)
-        
-        btn_report.callback = report_cb
-        view.add_item(btn_report)
-        
-        view.add_item(FavButton(sid, titre, row=0))
-        
-        seasons = info_serie.get('seasons', [])
-        options = [discord.SelectOption(label=f"Saison {s['season_number']}", value=str(s['season_number']), default=(str(s['season_number'])==season_num)) 
-                   for s in seasons if s['season_number'] > 0][:25]
-        
-        if options:
-            select = discord.ui.Select(placeholder=f"Saison {season_num}", options=options, row=1)
-            select.callback = lambda i: self.change_season(i, sid, info_serie, select.values[0])
-            view.add_item(select)
-        
-        await interaction.response.edit_message(embed=embed, view=view)
-
-class FavButton(discord.ui.Button):
-    def __init__(self, m_id, titre, row=0):
-        super().__init__(label="Favoris", style=discord.ButtonStyle.secondary, emoji="🤍", row=row)
-        self.m_id, self.titre = str(m_id), titre
+class BrowseNavButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"bnav:(?P<action>\w+):(?P<page>\d+):(?P<kind>recent|genre|year):(?P<value>.*)"):
+    """Navigation entre les pages d'une liste (nouveautés, genre, décennie) ; 🏠 ramène au panneau"""
+    def __init__(self, emoji, action, page, kind, value, disabled=False, row=3):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.primary, row=row, disabled=disabled,
+            custom_id=f"bnav:{action}:{page}:{kind}:{value}"
+        ))
+        self.action, self.page, self.kind, self.value = action, int(page), kind, value
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(item.emoji, match["action"], match["page"], match["kind"], match["value"])
+    
+    @timed("component", "browse_nav")
+    async def callback(self, interaction: discord.Interaction):
+        if self.action == "home":
+            return await interaction.response.edit_message(content=None, embed=catalogue_embed(), view=CatalogueView())
+        
+        target = {"first": 0, "prev": self.page - 1, "next": self.page + 1, "last": -1}[self.action]
+        page = browse_page(self.kind, self.value, target)
+        if page is None:
+            return await interaction.response.defer()
+        embed, view = page
+        await interaction.response.edit_message(content=None, embed=embed, view=view)
 
+class BrowseOpenButton(Guarded, discord.ui.DynamicItem[discord.ui.Button], template=r"bopen:(?P<type>movie|tv):(?P<id>\d+)"):
+    """Ouvre la fiche d'un titre parcouru"""
+    def __init__(self, media_type, media_id, emoji, row=0):
+        super().__init__(discord.ui.Button(
+            emoji=emoji, style=discord.ButtonStyle.secondary, row=row,
+            custom_id=f"bopen:{media_type}:{media_id}"
+        ))
+        self.media_type, self.media_id = media_type, str(media_id)
+    
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["type"], match["id"], item.emoji)
+    
+    @timed("component", "browse_open")
     async def callback(self, interaction: discord.Interaction):
-        db = load_db()
-        uid = str(interaction.user.id)
-        if uid not in db["favorites"]: db["favorites"][uid] = []
-        
-        if any(f['id'] == self.m_id for f in db["favorites"][uid]):
-            db["favorites"][uid] = [f for f in db["favorites"][uid] if f['id'] != self.m_id]
-            save_db(db)
-            return await interaction.response.send_message(f"💔 Retiré des favoris.", ephemeral=True)
-        
-        db["favorites"][uid].append({"id": self.m_id, "titre": self.titre})
-        save_db(db)
-        await interaction.response.send_message(f"❤️ Ajouté aux favoris !", ephemeral=True)
+        await show_card(interaction, self.media_type, self.media_id, edit=False)
+
+DYNAMIC_ITEMS = (WatchButton, ReportButton, FavButton, SeasonSelect, BackButton, FavEmojiButton, FavNavButton, NavButton, EmojiButton,
+                 BrowseSelect, BrowseNavButton, BrowseOpenButton)
 
 # --- COMMANDES ---
 
-@bot.tree.command(name="catalogue", description="Ouvrir le catalogue")
-async def catalogue(interaction: discord.Interaction):
-    embed = discord.Embed(title="✨ PATHÉ STREAMING", description="Utilisez le bouton ci-dessous pour chercher.", color=0x2b2d31)
-    embed.set_image(url="https://media.discordapp.net/attachments/1453864717897699379/1454074612815102148/Pathe_Logo.svg.png")
-    
-    view = discord.ui.View()
-    
-    btn_search = discord.ui.Button(label="Rechercher", style=discord.ButtonStyle.success, emoji="🔎")
-    btn_search.callback = lambda i: i.response.send_modal(SearchModal())
-    view.add_item(btn_search)
-    
-    btn_fav = discord.ui.Button(label="Mes Favoris", style=discord.ButtonStyle.secondary, emoji="⭐")
-    
-    async def show_favs(i):
-        db = load_db()
-        favs = db["favorites"].get(str(i.user.id), [])
-        if not favs: 
+class CatalogueView(Guarded, discord.ui.View):
+    """Panneau du catalogue (persistant, enregistré au démarrage)"""
+    def __init__(self):
+        super().__init__(timeout=None)
+    
+    @discord.ui.button(label="Rechercher", style=discord.ButtonStyle.success, emoji="🔎", custom_id="catalogue:search")
+    @timed("component", "catalogue_search")
+    async def search(self, i: discord.Interaction, button: discord.ui.Button):
+        await i.response.send_modal(SearchModal())
+    
+    @discord.ui.button(label="Nouveautés", style=discord.ButtonStyle.primary, emoji="🆕", custom_id="catalogue:recent")
+    @timed("component", "catalogue_recent")
+    async def recent(self, i: discord.Interaction, button: discord.ui.Button):
+        page = browse_page("recent")
+        if page is None:
+            return await i.response.send_message("❌ Le catalogue est vide.", ephemeral=True)
+        
+        embed, view = page
+        await i.response.send_message(embed=embed, view=view, ephemeral=True)
+    
+    @discord.ui.button(label="Genres", style=discord.ButtonStyle.primary, emoji="🎭", custom_id="catalogue:genres")
+    @timed("component", "catalogue_genres")
+    async def genres(self, i: discord.Interaction, button: discord.ui.Button):
+        await self.send_menu(i, "genre")
+    
+    @discord.ui.button(label="Années", style=discord.ButtonStyle.primary, emoji="📅", custom_id="catalogue:years")
+    @timed("component", "catalogue_years")
+    async def years(self, i: discord.Interaction, button: discord.ui.Button):
+        await self.send_menu(i, "year")
+    
+    async def send_menu(self, i, kind):
+        view = browse_menu(kind)
+        if view is None:
+            return await i.response.send_message("❌ Le catalogue est vide.", ephemeral=True)
+        await i.response.send_message("Que veux-tu parcourir ?", view=view, ephemeral=True)
+    
+    @discord.ui.button(label="Mes Favoris", style=discord.ButtonStyle.secondary, emoji="⭐", custom_id="catalogue:favorites")
+    @timed("component", "catalogue_favorites")
+    async def show_favs(self, i: discord.Interaction, button: discord.ui.Button):
+        page = await favorites_page(i.user.id)
+        if page is None: 
             return await i.response.send_message("❌ Ta liste de favoris est vide.", ephemeral=True)
         
-        embed_fav = discord.Embed(
-            title="❤️ Mes Favoris",
-            color=0x2b2d31
-        )
-        
-        fav_text = ""
-        for idx, f in enumerate(favs[:len(EMOJI_LIST)]):
-            fav_text += f"{EMOJI_LIST[idx]} {f['titre']}\n"
-        
-        embed_fav.add_field(name="", value=fav_text, inline=False)
-        embed_fav.set_footer(text=f"Page 1/1 - Total de {len(favs)} résultat(s)")
-        
-        await i.response.send_message(embed=embed_fav, view=FavoritesView(favs), ephemeral=True)
-    
-    btn_fav.callback = show_favs
-    view.add_item(btn_fav)
-    
-    await interaction.response.send_message(embed=embed, view=view)
+        embed, view = page
+        await i.response.send_message(embed=embed, view=view, ephemeral=True)
+
+def catalogue_embed():
+    embed = discord.Embed(title="✨ PATHÉ STREAMING", description="Utilisez le bouton ci-dessous pour chercher.", color=0x2b2d31)
+    embed.set_image(url="https://media.discordapp.net/attachments/1453864717897699379/1454074612815102148/Pathe_Logo.svg.png")
+    return embed
+
+@bot.tree.command(name="catalogue", description="Ouvrir le catalogue")
+async def catalogue(interaction: discord.Interaction):
+    await interaction.response.send_message(embed=catalogue_embed(), view=CatalogueView())
 
-class SearchModal(discord.ui.Modal, title="🎬 Recherche"):
-    recherche = discord.ui.TextInput(label="Nom du film ou de la série", min_length=2)
+class SearchModal(Guarded, discord.ui.Modal, title="🎬 Recherche"):
+    recherche = discord.ui.TextInput(label="Nom du film ou de la série", min_length=2, max_length=QUERY_MAX_LEN)
     
+    @timed("modal", "search")
     async def on_submit(self, interaction: discord.Interaction):
-        results = search_tmdb(self.recherche.value)
-        valid = [r for r in results if r.get('media_type') in ['movie', 'tv']][:len(EMOJI_LIST)]
-        
-        if not valid: 
+        page = await search_results(self.recherche.value)
+        if page is None: 
             return await interaction.response.send_message("❌ Aucun résultat trouvé.", ephemeral=True)
         
-        embed = discord.Embed(
-            title=f"🔎 Résultat de la Recherche \"{self.recherche.value}\"",
-            description="**Pour accéder à votre Recherche, cliquez sur l'emoji correspondant.**",
-            color=0x2b2d31
-        )
-        
-        result_text = ""
-        for i, r in enumerate(valid):
-            result_text += f"{EMOJI_LIST[i]} {r.get('title') or r.get('name')}\n"
-        
-        embed.add_field(name="", value=result_text, inline=False)
-        embed.set_footer(text=f"Page 1/1 - Total de {len(valid)} résultat(s)")
-        
-        await interaction.response.send_message(embed=embed, view=ResultView(valid, self.recherche.value), ephemeral=True)
+        embed, view = page
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+@bot.tree.command(name="rechercher", description="Rechercher un film ou une série")
+async def rechercher(interaction: discord.Interaction, titre: str):
+    # Choix de l'autocomplétion : "type:id"
+    m = re.fullmatch(r"(movie|tv):(\d+)", titre)
+    if m:
+        return await show_card(interaction, m[1], m[2], edit=False)
+    
+    page = await search_results(titre[:QUERY_MAX_LEN])
+    if page is None: 
+        return await interaction.response.send_message("❌ Aucun résultat trouvé.", ephemeral=True)
+    
+    embed, view = page
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+@rechercher.autocomplete('titre')
+async def rechercher_autocomplete(interaction: discord.Interaction, current: str):
+    return await autocomplete_titles(current, value=lambda e: f"{e['media_type']}:{e['id']}")
 
 @bot.tree.command(name="ajouter_film", description="Ajouter un film avec ses liens")
 async def add_film(interaction: discord.Interaction, tmdb_id: str, lien_lecture: str, lien_bande_annonce: str = None):
     if not interaction.user.guild_permissions.administrator: 
         return await interaction.response.send_message("❌ Réservé aux admins.", ephemeral=True)
     
-    db = load_db()
-    db["links"][tmdb_id] = lien_lecture
-    
-    if lien_bande_annonce:
-        db["trailers"][tmdb_id] = lien_bande_annonce
-    
-    save_db(db)
+    store.set_movie(tmdb_id, lien_lecture, lien_bande_annonce)
+    cards.invalidate(tmdb_id)
     
     msg = f"✅ Film ajouté (ID: {tmdb_id})\n📺 Lien de lecture ajouté"
     if lien_bande_annonce:
         msg += "\n🎬 Bande-annonce ajoutée"
     
     await interaction.response.send_message(msg, ephemeral=True)
+    await reports.resolve("movie", tmdb_id, 0)
+    await remember_media("movie", tmdb_id)
     
     # Envoyer notification
-    await send_notification("movie", tmdb_id, interaction.user)
+    send_notification("movie", tmdb_id, interaction.user)
+
+@add_film.autocomplete('tmdb_id')
+async def add_film_autocomplete(interaction: discord.Interaction, current: str):
+    return await autocomplete_titles(current, media_type="movie")
 
 @bot.tree.command(name="ajouter_saison", description="Ajouter une saison complète d'une série")
-async def add_season(interaction: discord.Interaction, tmdb_id: str, saison: int, liens: str):
+async def add_season(interaction: discord.Interaction, tmdb_id: str, saison: app_commands.Range[int, 1, 65535], liens: str):
     if not interaction.user.guild_permissions.administrator: 
         return await interaction.response.send_message("❌ Réservé aux admins.", ephemeral=True)
     
     liste_liens = liens.replace(',', ' ').split()
-    db = load_db()
-    
-    for i, lien in enumerate(liste_liens, 1):
-        db["links"][f"{tmdb_id}_S{saison}_E{i}"] = lien
-    
-    save_db(db)
+    store.set_season(tmdb_id, saison, liste_liens)
+    cards.invalidate(tmdb_id)
     await interaction.response.send_message(f"✅ {len(liste_liens)} épisodes ajoutés pour la saison {saison} !", ephemeral=True)
+    await reports.resolve("tv", tmdb_id, saison)
+    await remember_media("tv", tmdb_id)
     
     # Envoyer notification
-    await send_notification("tv", tmdb_id, interaction.user)
+    send_notification("tv", tmdb_id, interaction.user)
+
+@add_season.autocomplete('tmdb_id')
+async def add_season_autocomplete(interaction: discord.Interaction, current: str):
+    return await autocomplete_titles(current, media_type="tv")
+
+@bot.tree.command(name="importer", description="Importer un catalogue en masse (fichier CSV ou JSON)")
+async def import_catalogue(interaction: discord.Interaction, fichier: discord.Attachment):
+    if not interaction.user.guild_permissions.administrator: 
+        return await interaction.response.send_message("❌ Réservé aux admins.", ephemeral=True)
+    
+    from importer import run_import
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    report = await run_import(await fichier.read(), fichier.filename, store, tmdb)
+    
+    for media_type, media_id, meta in report.media:
+        cards.invalidate(media_id)
+        title_index.add(media_type, media_id, meta["title"], meta["original_title"], meta["year"])
+        browse_index.add(media_type, media_id, meta)
+    # Liens remplacés : les signalements en cours sont résolus, comme avec /ajouter_film et /ajouter_saison
+    for media_type, media_id, season in report.imported:
+        await reports.resolve(media_type, media_id, season)
+    
+    await interaction.followup.send(report.summary(), ephemeral=True)
+    
+    # Mis en file ensemble : une seule notification récapitulative pour tout l'import
+    for media_type, media_id, _ in report.media:
+        send_notification(media_type, media_id, interaction.user)
+
+@bot.tree.command(name="debug_boucle", description="Activer/désactiver le mode debug asyncio (callbacks lents)")
+async def debug_loop(interaction: discord.Interaction, actif: bool, seuil_ms: int = 100):
+    if not interaction.user.guild_permissions.administrator: 
+        return await interaction.response.send_message("❌ Réservé aux admins.", ephemeral=True)
+    
+    watchdog.set_debug(actif, seuil_ms / 1000)
+    etat = f"activé (callbacks > {seuil_ms} ms journalisés)" if actif else "désactivé"
+    await interaction.response.send_message(f"🛠️ Mode debug asyncio {etat}. Blocages détectés : {watchdog.stalls}", ephemeral=True)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    observe_command(interaction)
 
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    # Appelé aussi à chaque reconnexion : la synchronisation des commandes se fait dans setup_hook
+    global prewarm_task
+    if prewarm_task is None:
+        prewarm_task = background(prewarm())
     print(f"✅ Bot connecté : {bot.user}")
 
-keep_alive()
-bot.run(os.getenv('DISCORD_TOKEN'))
\ No newline at end of file
+if __name__ == "__main__":
+    bot.run(os.getenv('DISCORD_TOKEN'))
@@ -0,0 +1,128 @@
+import bisect
+import math
+import time
+from collections import defaultdict
+
+from title_index import fold
+
+RECENT, GENRE, YEAR = "recent", "genre", "year"
+MAX_OPTIONS = 25  # Limite Discord des options d'un menu
+
+
+def decade(year):
+    """ "1994" -> "1990" ; None si l'année est inconnue."""
+    return f"{year[:3]}0" if year and year[:4].isdigit() else None
+
+
+class BrowseIndex:
+    """Index de navigation du catalogue : nouveautés, par genre, par décennie.
+
+    Construit depuis les métadonnées enregistrées (store.all_media) et mis à
+    jour à chaque ajout : aucune requête TMDB pendant la navigation. Chaque
+    liste est gardée triée, une page n'est qu'une tranche de liste.
+    """
+
+    def __init__(self):
+        self.entries = {}                  # (type, id) -> entrée
+        self._recent = []                  # (-ajouté le, (type, id)), récents d'abord
+        self._genres = defaultdict(list)   # genre -> [(titre replié, (type, id))]
+        self._decades = defaultdict(list)  # décennie -> [(-année, titre replié, (type, id))]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, media_type, media_id, meta, added_at=None):
+        """Ajoute ou met à jour un média ; sans `added_at`, la date d'ajout connue est conservée."""
+        for items, item in self._insert(media_type, media_id, meta, added_at):
+            bisect.insort(items, item)
+
+    def add_many(self, items):
+        """Ajout en masse (chargement au démarrage) de tuples (type, id, méta,
+        ajouté le) : chaque liste est triée une fois au lieu d'une insertion
+        triée par média."""
+        items = {(media_type, str(media_id)): rest for media_type, media_id, *rest in items}
+        for key in items.keys() & self.entries.keys():
+            added_at = self.entries[key]["added_at"]
+            self.remove(*key)
+            meta, *rest = items[key]
+            # Date d'ajout connue conservée, comme pour add
+            items[key] = (meta, rest[0] if rest and rest[0] is not None else added_at)
+        for key, rest in items.items():
+            for target, item in self._insert(*key, *rest):
+                target.append(item)
+        # Timsort : les listes déjà triées (ou presque) le sont en temps linéaire
+        for target in (self._recent, *self._genres.values(), *self._decades.values()):
+            target.sort()
+
+    def _insert(self, media_type, media_id, meta, added_at=None):
+        """Enregistre l'entrée ; renvoie les (liste, élément) à y ranger."""
+        key = (media_type, str(media_id))
+        previous = self.entries.get(key)
+        if added_at is None:
+            added_at = previous["added_at"] if previous else time.time()
+        if previous is not None:
+            self.remove(*key)
+        entry = {"media_type": media_type, "id": str(media_id), "title": meta.get("title") or str(media_id),
+                 "year": meta.get("year"), "genres": list(meta.get("genres") or []), "added_at": added_at}
+        self.entries[key] = entry
+        items = [(self._recent, (-added_at, key))]
+        items += [(self._genres[genre], self._genre_item(entry, key)) for genre in entry["genres"]]
+        if decade(entry["year"]):
+            items.append((self._decades[decade(entry["year"])], self._decade_item(entry, key)))
+        return items
+
+    def remove(self, media_type, media_id):
+        key = (media_type, str(media_id))
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._discard(self._recent, (-entry["added_at"], key))
+        for genre in entry["genres"]:
+            self._discard(self._genres[genre], self._genre_item(entry, key))
+            if not self._genres[genre]:
+                del self._genres[genre]
+        group = decade(entry["year"])
+        if group:
+            self._discard(self._decades[group], self._decade_item(entry, key))
+            if not self._decades[group]:
+                del self._decades[group]
+
+    @staticmethod
+    def _genre_item(entry, key):
+        return (fold(entry["title"]), key)
+
+    @staticmethod
+    def _decade_item(entry, key):
+        return (-int(entry["year"][:4]), fold(entry["title"]), key)
+
+    @staticmethod
+    def _discard(items, item):
+        i = bisect.bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    def genres(self):
+        """[(genre, nombre de médias)], les plus fournis d'abord."""
+        counts = sorted(((g, len(items)) for g, items in self._genres.items()), key=lambda gc: (-gc[1], gc[0]))
+        return counts[:MAX_OPTIONS]
+
+    def decades(self):
+        """[(décennie, nombre de médias)], les plus récentes d'abord."""
+        return sorted(((d, len(items)) for d, items in self._decades.items()), reverse=True)[:MAX_OPTIONS]
+
+    def _items(self, kind, value):
+        if kind == RECENT:
+            return self._recent
+        if kind == GENRE:
+            return self._genres.get(value, [])
+        return self._decades.get(value, [])
+
+    def page(self, kind, value, n, size):
+        """Entrées de la page n (-1 : dernière, ramenée dans les bornes), son numéro et le nombre de pages."""
+        items = self._items(kind, value)
+        pages = max(1, math.ceil(len(items) / size))
+        n = pages - 1 if n < 0 else max(0, min(n, pages - 1))
+        return [self.entries[item[-1]] for item in items[n * size:(n + 1) * size]], n, pages
+
+    def count(self, kind, value):
+        return len(self._items(kind, value))
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU borné en taille, avec une durée de vie par entrée.
+
+    Les requêtes concurrentes sur une même clé absente sont regroupées :
+    un seul appel à `fetch`, tous les appelants reçoivent son résultat.
+    """
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # clé -> (expire_le, valeur)
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key, default=None):
+        """Valeur en cache même expirée (tant qu'elle n'a pas été évincée)."""
+        entry = self._data.get(key)
+        return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch, ttl):
+        """Renvoie la valeur en cache ou l'obtient via `fetch()` (coroutine).
+        Les résultats vides (erreurs) ne sont pas mis en cache."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return await self.coalesce(key, lambda: self._fill(key, fetch, ttl))
+
+    async def coalesce(self, key, fetch):
+        """Un seul appel à `fetch()` à la fois par clé : les appelants
+        concurrents attendent le même résultat (rien n'est mis en cache)."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant n'annule pas les autres
+        return await asyncio.shield(task)
+
+    async def _fill(self, key, fetch, ttl):
+        value = await fetch()
+        if value:
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,197 @@
+import discord
+
+import metrics
+from cache import TTLCache
+
+POSTER_URL = "https://image.tmdb.org/t/p/w500{}"
+YOUTUBE_URL = "https://www.youtube.com/watch?v={}"
+CARD_COLOR = 0x2b2d31
+CARD_TTL = 3600  # Durée de vie d'une fiche rendue (secondes)
+
+FIELD_MAX_LEN = 1024   # Limite Discord pour la valeur d'un champ
+EPISODE_FIELDS_MAX = 4 # Reste sous la limite de 6000 caractères par embed
+
+
+# --- RENDU ---
+def genres_text(info):
+    return ", ".join([g['name'] for g in info.get('genres', [])]) or "Non spécifié"
+
+def episode_fields(episodes, links, dead=()):
+    """Liste des épisodes d'une saison, découpée en valeurs de champs Discord.
+    `links` est le dictionnaire {episode: url} renvoyé par store.get_season_links ;
+    les épisodes de `dead` (liens morts) sont affichés sans lien."""
+    lines = ["**Épisodes:**"]
+    for e in episodes:
+        num = e['episode_number']
+        lien = links.get(num)
+        if num in dead:
+            lines.append(f"Episode {num} ⚠️ lien indisponible")
+        else:
+            lines.append(f"[Episode {num}]({lien})" if lien else f"Episode {num}")
+
+    fields, size = [[]], 0
+    for line in lines:
+        line = line[:FIELD_MAX_LEN - 1]
+        if size + len(line) + 1 > FIELD_MAX_LEN:
+            if len(fields) == EPISODE_FIELDS_MAX:
+                break
+            fields.append([])
+            size = 0
+        fields[-1].append(line)
+        size += len(line) + 1
+
+    shown = sum(len(f) for f in fields)
+    if shown < len(lines):
+        # Plus de place : on remplace la fin par le nombre d'épisodes masqués
+        last = fields[-1]
+        while size + len(f"… et {len(lines) - shown} autre(s) épisode(s)") > FIELD_MAX_LEN:
+            size -= len(last.pop()) + 1
+            shown -= 1
+        last.append(f"… et {len(lines) - shown} autre(s) épisode(s)")
+    return ["\n".join(f) for f in fields]
+
+def trailer_url(videos):
+    """Bande-annonce YouTube trouvée dans la réponse TMDB « videos », ou None."""
+    for video in (videos or {}).get('results', []):
+        if video.get('site') == "YouTube" and video.get('type') == "Trailer" and video.get('key'):
+            return YOUTUBE_URL.format(video['key'])
+    return None
+
+def movie_embed(info, media_id):
+    embed = discord.Embed(title=info.get('title') or info.get('name'), color=CARD_COLOR)
+    embed.add_field(name="Genres:", value=genres_text(info), inline=False)
+    embed.add_field(name="Date de sortie:", value=(info.get('release_date') or 'Inconnue')[:4], inline=False)
+    embed.add_field(name="Synopsis:", value=(info.get('overview') or 'Non spécifié')[:500], inline=False)
+    if info.get('poster_path'):
+        embed.set_image(url=POSTER_URL.format(info['poster_path']))
+    embed.set_footer(text=f"ID TMDB: {media_id}")
+    return embed
+
+def season_embed(info, season_data, season_num, links, media_id, dead=()):
+    embed = discord.Embed(title=f"{info.get('name')} - Saison {season_num}", color=CARD_COLOR)
+    embed.add_field(name="Genres:", value=genres_text(info), inline=False)
+    date_sortie = season_data.get('air_date') or info.get('first_air_date') or 'Inconnue'
+    embed.add_field(name="Date de sortie:", value=date_sortie[:4], inline=False)
+    synopsis = season_data.get('overview') or info.get('overview') or 'Non spécifié'
+    embed.add_field(name="Synopsis:", value=synopsis[:300], inline=False)
+    for value in episode_fields(season_data.get('episodes', []), links, dead):
+        embed.add_field(name="", value=value, inline=False)
+    if season_data.get('poster_path'):
+        embed.set_image(url=POSTER_URL.format(season_data['poster_path']))
+    embed.set_footer(text=f"ID TMDB: {media_id}")
+    return embed
+
+def notification_embed(info, media_type, media_id, author):
+    embed = discord.Embed(
+        title=f"{'🎬' if media_type == 'movie' else '📺'} Nouveau contenu ajouté !",
+        description=f"**{info.get('title') or info.get('name')}**",
+        color=0x00ff00
+    )
+    synopsis = (info.get('overview') or 'Aucun synopsis disponible')[:200]
+    embed.add_field(name="Synopsis", value=synopsis + "...", inline=False)
+    if info.get('poster_path'):
+        embed.set_thumbnail(url=POSTER_URL.format(info['poster_path']))
+    embed.add_field(name="Type", value="Film 🎬" if media_type == "movie" else "Série 📺", inline=True)
+    embed.add_field(name="ID TMDB", value=media_id, inline=True)
+    embed.set_footer(text=f"Ajouté par {author}")
+    return embed
+
+def digest_embed(items, author):
+    """Résumé d'un ajout groupé. `items` : liste de (type, titre)."""
+    embed = discord.Embed(title=f"📦 {len(items)} nouveaux titres ajoutés !", color=0x00ff00)
+    lines = [f"{'🎬' if media_type == 'movie' else '📺'} {titre}" for media_type, titre in items]
+    description = ""
+    for idx, line in enumerate(lines):
+        if len(description) + len(line) + 40 > 4096:
+            description += f"… et {len(lines) - idx} autre(s)"
+            break
+        description += line + "\n"
+    embed.description = description
+    embed.set_footer(text=f"Ajouté par {author}")
+    return embed
+
+
+# --- CACHE DES FICHES ---
+class Card:
+    """Fiche rendue : embed sérialisé + données utiles aux vues."""
+    __slots__ = ("embed_data", "titre", "lien", "lien_mort", "trailer", "seasons")
+
+    def __init__(self, embed, titre, lien=None, trailer=None, seasons=(), lien_mort=False):
+        self.embed_data = embed.to_dict()
+        self.titre = titre
+        self.lien = lien
+        self.lien_mort = lien_mort
+        self.trailer = trailer
+        self.seasons = seasons
+
+    def embed(self):
+        # Nouvel objet à chaque appel : un embed est modifiable
+        return discord.Embed.from_dict(self.embed_data)
+
+
+class CardRenderer:
+    """Construit les fiches film/saison et les garde en cache par
+    (média, saison, version des liens). `invalidate` est appelé quand les
+    liens d'un média changent, ou que l'un d'eux change d'état dans l'index
+    de santé des liens (`health`, voir linkcheck).
+
+    Les affichages simultanés d'une même fiche (rafale de « Regarder » sur
+    une notification) partagent un seul rendu, donc un seul appel TMDB."""
+
+    def __init__(self, store, tmdb, health=None, maxsize=512):
+        self.store = store
+        self.tmdb = tmdb
+        self.health = health
+        self.cache = TTLCache(maxsize=maxsize)
+        self._versions = {}
+
+    def invalidate(self, media_id):
+        media_id = str(media_id)
+        self._versions[media_id] = self._versions.get(media_id, 0) + 1
+
+    def _dead(self, url):
+        return self.health is not None and url is not None and self.health.is_dead(url)
+
+    def _key(self, media_type, media_id, season=0):
+        media_id = str(media_id)
+        return (media_type, media_id, int(season), self._versions.get(media_id, 0))
+
+    async def movie(self, media_id):
+        """Fiche d'un film, ou None si TMDB ne répond pas."""
+        return await self.cache.get_or_fetch(self._key("movie", media_id), lambda: self._render_movie(media_id), CARD_TTL)
+
+    async def season(self, media_id, season_num):
+        """Fiche d'une saison de série, ou None si TMDB ne répond pas."""
+        return await self.cache.get_or_fetch(
+            self._key("tv", media_id, season_num), lambda: self._render_season(media_id, season_num), CARD_TTL
+        )
+
+    @metrics.timed(metrics.OPERATION_SECONDS, op="render_movie")
+    async def _render_movie(self, media_id):
+        info, extra = await self.tmdb.details_with(f"movie/{media_id}", "videos")
+        if not info:
+            return None
+        lien = self.store.get_link(media_id)
+        trailer = self.store.get_trailer(media_id)
+        if self._dead(trailer):
+            trailer = None
+        return Card(
+            movie_embed(info, media_id),
+            info.get('title') or info.get('name'),
+            lien=lien,
+            lien_mort=self._dead(lien),
+            trailer=trailer or trailer_url(extra["videos"]),
+        )
+
+    @metrics.timed(metrics.OPERATION_SECONDS, op="render_season")
+    async def _render_season(self, media_id, season_num):
+        # Détails, saison et vidéos en un seul aller-retour TMDB
+        info, extra = await self.tmdb.details_with(f"tv/{media_id}", f"season/{season_num}", "videos")
+        if not info:
+            return None
+        season_data = extra[f"season/{season_num}"]
+        links = self.store.get_season_links(media_id, season_num)
+        dead = {ep for ep, url in links.items() if self._dead(url)}
+        seasons = tuple(s['season_number'] for s in info.get('seasons', []) if s['season_number'] > 0)
+        return Card(season_embed(info, season_data, season_num, links, media_id, dead), info.get('name'),
+                    trailer=trailer_url(extra["videos"]), seasons=seasons)
@@ -0,0 +1,393 @@
+"""Représentation compacte des liens du catalogue et instantané binaire.
+
+Un instantané contient tous les liens sous forme de tableaux d'entiers :
+ids TMDB triés (recherche dichotomique), tables d'épisodes par saison,
+et URLs découpées en préfixe partagé (« https://hebergeur/dossier/ ») +
+suffixe. Il se lit directement depuis le fichier via mmap : le chargement
+ne décode rien, les URLs sont reconstruites à la lecture.
+
+Format (little-endian) : en-tête MAGIC, puis (offset, taille) de chaque
+section de SECTIONS, puis les sections alignées sur 8 octets.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+MAGIC = b"PATHSNP1"
+SECTIONS = (
+    ("prefixes", "B"),       # préfixes d'URL en UTF-8, séparés par \0
+    ("url_prefix", "I"),     # URL n -> index de son préfixe
+    ("url_end", "Q"),        # URL n -> fin de son suffixe dans `suffixes`
+    ("suffixes", "B"),       # suffixes d'URL en UTF-8, bout à bout
+    ("movie_ids", "I"),      # ids des films, triés
+    ("movie_urls", "I"),     # URL du film de même rang
+    ("trailer_ids", "I"),
+    ("trailer_urls", "I"),
+    ("season_keys", "Q"),    # id série << 16 | saison, triés
+    ("season_start", "I"),   # début de la saison dans `episodes`
+    ("season_count", "I"),   # nombre d'épisodes (numéro du dernier)
+    ("episodes", "I"),       # URL de l'épisode + 1 (0 : pas de lien)
+)
+_HEADER = struct.Struct("<8s" + "QQ" * len(SECTIONS))
+MAX_SEASON = 0xFFFF  # La saison occupe les 16 bits de poids faible de `season_keys`
+
+
+def check_season(season, episode=1):
+    """Saison 1..MAX_SEASON et épisode >= 1, sinon ValueError."""
+    if not 1 <= season <= MAX_SEASON:
+        raise ValueError(f"saison hors limites (1-{MAX_SEASON}) : {season}")
+    if episode < 1:
+        raise ValueError(f"numéro d'épisode invalide : {episode}")
+
+
+def split_url(url):
+    """ "https://hote/dossier/reste" -> ("https://hote/dossier/", "reste")"""
+    cut = url.find("/", url.find("://") + 3) + 1
+    if cut:
+        cut = url.find("/", cut) + 1 or cut
+    return url[:cut], url[cut:]
+
+
+def numeric_id(media_id):
+    """Id TMDB entier, ou None pour une ancienne clé non numérique."""
+    media_id = str(media_id)
+    if media_id.isdigit() and media_id == str(int(media_id)) and int(media_id) < 2**32:
+        return int(media_id)
+    return None
+
+
+# --- Écriture ---
+def build_snapshot(movies, trailers, episodes):
+    """Instantané (bytes) à partir de (id, url), (id, url) et (id, saison, épisode, url)."""
+    prefixes, prefix_ids = [], {}
+    url_prefix, url_end = array("I"), array("Q")
+    suffixes = bytearray()
+
+    def add_url(url):
+        prefix, suffix = split_url(url)
+        idx = prefix_ids.get(prefix)
+        if idx is None:
+            idx = prefix_ids[prefix] = len(prefixes)
+            prefixes.append(prefix)
+        url_prefix.append(idx)
+        suffixes.extend(suffix.encode("utf-8"))
+        url_end.append(len(suffixes))
+        return len(url_prefix) - 1
+
+    def table(pairs):
+        ids, urls = array("I"), array("I")
+        for media_id, url in sorted(pairs):
+            ids.append(media_id)
+            urls.append(add_url(url))
+        return ids, urls
+
+    movie_ids, movie_urls = table(movies)
+    trailer_ids, trailer_urls = table(trailers)
+
+    seasons = {}
+    for media_id, season, episode, url in episodes:
+        check_season(season, episode)
+        seasons.setdefault(media_id << 16 | season, {})[episode] = url
+    season_keys, season_start, season_count, episode_urls = array("Q"), array("I"), array("I"), array("I")
+    for key in sorted(seasons):
+        eps = seasons[key]
+        season_keys.append(key)
+        season_start.append(len(episode_urls))
+        season_count.append(max(eps))
+        episode_urls.extend(add_url(eps[n]) + 1 if n in eps else 0 for n in range(1, max(eps) + 1))
+
+    data = {
+        "prefixes": "\0".join(prefixes).encode("utf-8"), "url_prefix": url_prefix, "url_end": url_end,
+        "suffixes": bytes(suffixes), "movie_ids": movie_ids, "movie_urls": movie_urls,
+        "trailer_ids": trailer_ids, "trailer_urls": trailer_urls, "season_keys": season_keys,
+        "season_start": season_start, "season_count": season_count, "episodes": episode_urls,
+    }
+    body, layout = bytearray(), []
+    for name, _ in SECTIONS:
+        raw = data[name].tobytes() if isinstance(data[name], array) else data[name]
+        body.extend(b"\0" * (-(_HEADER.size + len(body)) % 8))
+        layout += [_HEADER.size + len(body), len(raw)]
+        body.extend(raw)
+    return _HEADER.pack(MAGIC, *layout) + bytes(body)
+
+
+# --- Lecture ---
+class Snapshot:
+    """Liens d'un instantané, lus sans copie (fichier mappé en mémoire ou bytes)."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, *layout = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("instantané de catalogue invalide")
+        for (name, code), offset, size in zip(SECTIONS, layout[::2], layout[1::2]):
+            setattr(self, name, view[offset:offset + size].cast(code))
+        self._prefixes = [sys.intern(p) for p in bytes(self.prefixes).decode("utf-8").split("\0")]
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("instantané de catalogue vide")
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def url(self, n):
+        start = self.url_end[n - 1] if n else 0
+        return self._prefixes[self.url_prefix[n]] + bytes(self.suffixes[start:self.url_end[n]]).decode("utf-8")
+
+    def urls(self, first, last):
+        """URLs first..last incluses, décodées en un bloc (épisodes d'une saison)."""
+        start = self.url_end[first - 1] if first else 0
+        ends = self.url_end[first:last + 1].tolist()
+        blob = bytes(self.suffixes[start:ends[-1]])
+        text = blob.decode("utf-8")
+        if len(text) != len(blob):
+            # Caractères non ASCII : les offsets en octets ne valent pas en caractères
+            return [self.url(n) for n in range(first, last + 1)]
+        prefixes, out, offset = self._prefixes, [], start
+        for prefix, end in zip(self.url_prefix[first:last + 1].tolist(), ends):
+            out.append(prefixes[prefix] + text[offset - start:end - start])
+            offset = end
+        return out
+
+    def _lookup(self, ids, urls, media_id):
+        idx = bisect_left(ids, media_id)
+        if idx < len(ids) and ids[idx] == media_id:
+            return self.url(urls[idx])
+        return None
+
+    def movie(self, media_id):
+        return self._lookup(self.movie_ids, self.movie_urls, media_id)
+
+    def trailer(self, media_id):
+        return self._lookup(self.trailer_ids, self.trailer_urls, media_id)
+
+    def season(self, media_id, season):
+        """{épisode: url}"""
+        key = media_id << 16 | season
+        idx = bisect_left(self.season_keys, key)
+        if idx == len(self.season_keys) or self.season_keys[idx] != key:
+            return {}
+        start = self.season_start[idx]
+        present = [(ep, n - 1) for ep, n in enumerate(self.episodes[start:start + self.season_count[idx]].tolist(), 1) if n]
+        # Les URLs d'une saison sont contiguës dans l'instantané
+        first = present[0][1]
+        urls = self.urls(first, present[-1][1])
+        return {ep: urls[n - first] for ep, n in present}
+
+    def movies(self):
+        return ((self.movie_ids[i], self.url(self.movie_urls[i])) for i in range(len(self.movie_ids)))
+
+    def trailers(self):
+        return ((self.trailer_ids[i], self.url(self.trailer_urls[i])) for i in range(len(self.trailer_ids)))
+
+    def season_list(self):
+        return [(key >> 16, key & 0xFFFF) for key in self.season_keys]
+
+    def episodes_iter(self):
+        for media_id, season in self.season_list():
+            for ep, url in self.season(media_id, season).items():
+                yield media_id, season, ep, url
+
+    def close(self):
+        for name, _ in SECTIONS:
+            getattr(self, name).release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+EMPTY = build_snapshot((), (), ())
+
+
+class Favorite:
+    """Favori d'un utilisateur (stockage JSON en mémoire)."""
+
+    __slots__ = ("id", "titre", "media_type", "poster_path", "year")
+
+    def __init__(self, id, titre, media_type=None, poster_path=None, year=None):
+        self.id = sys.intern(str(id))
+        self.titre = titre
+        self.media_type = media_type and sys.intern(media_type)
+        self.poster_path = poster_path
+        self.year = year
+
+    @classmethod
+    def from_dict(cls, fav):
+        return cls(fav['id'], fav['titre'], fav.get('media_type'), fav.get('poster_path'), fav.get('year'))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CompactLinks:
+    """Liens du catalogue : un instantané compact en lecture seule, plus les
+    modifications récentes dans de petits dictionnaires jusqu'au prochain
+    instantané. Les ids non numériques (anciennes clés) restent dans `extra`
+    et `extra_trailers`, au format de db_links.json."""
+
+    def __init__(self, snapshot=None):
+        self.base = snapshot if snapshot is not None else Snapshot(EMPTY)
+        self.extra = {}
+        self.extra_trailers = {}
+        # Modifications pas encore dans `base`, la plus récente en premier ;
+        # deux pendant l'écriture d'un instantané (cf. prepare_snapshot)
+        self._changes = [self._layer()]
+
+    @staticmethod
+    def _layer():
+        return {"movies": {}, "trailers": {}, "seasons": {}}
+
+    @classmethod
+    def from_links(cls, links, trailers, parse_key):
+        """Depuis les dictionnaires de db_links.json ; `parse_key` : storage.parse_link_key."""
+        movies, episodes, extra = [], [], {}
+        for key, url in links.items():
+            media_id, season, episode = parse_key(key)
+            num = numeric_id(media_id)
+            if num is None or (key != media_id and not (1 <= season <= MAX_SEASON and episode >= 1)):
+                # Ancienne clé non numérique, ou saison non représentable (saison 0...)
+                extra[key] = url
+            elif season:
+                episodes.append((num, season, episode, url))
+            else:
+                movies.append((num, url))
+        numeric = [(numeric_id(i), url) for i, url in trailers.items() if numeric_id(i) is not None]
+        catalogue = cls(Snapshot(build_snapshot(movies, numeric, episodes)))
+        catalogue.extra = extra
+        catalogue.extra_trailers = {i: url for i, url in trailers.items() if numeric_id(i) is None}
+        return catalogue
+
+    @property
+    def changed(self):
+        """Modifications pas encore dans un instantané ?"""
+        return any(any(layer.values()) for layer in self._changes)
+
+    # --- Lecture ---
+    def get_link(self, media_id):
+        num = numeric_id(media_id)
+        if num is None:
+            return self.extra.get(str(media_id))
+        for layer in self._changes:
+            if num in layer["movies"]:
+                return layer["movies"][num]
+        return self.base.movie(num)
+
+    def get_trailer(self, media_id):
+        num = numeric_id(media_id)
+        if num is None:
+            return self.extra_trailers.get(str(media_id))
+        for layer in self._changes:
+            if num in layer["trailers"]:
+                return layer["trailers"][num]
+        return self.base.trailer(num)
+
+    def get_season_links(self, media_id, season):
+        num = numeric_id(media_id)
+        if num is None:
+            prefix = f"{media_id}_S{int(season)}_E"
+            return {int(key[len(prefix):]): url for key, url in self.extra.items() if key.startswith(prefix)}
+        return _season(self.base, self._changes, num, int(season))
+
+    # --- Écriture ---
+    def set_movie(self, media_id, url):
+        num = numeric_id(media_id)
+        if num is None:
+            self.extra[str(media_id)] = url
+        else:
+            self._changes[0]["movies"][num] = url
+
+    def set_trailer(self, media_id, url):
+        num = numeric_id(media_id)
+        if num is None:
+            self.extra_trailers[str(media_id)] = url
+        else:
+            self._changes[0]["trailers"][num] = url
+
+    def set_episodes(self, media_id, season, urls, link_key):
+        """Épisodes 1..n d'une saison ; `link_key` : storage.link_key (ids non numériques)."""
+        check_season(int(season))
+        num = numeric_id(media_id)
+        if num is None:
+            for ep, url in enumerate(urls, 1):
+                self.extra[link_key(media_id, int(season), ep)] = url
+        else:
+            self._changes[0]["seasons"].setdefault((num, int(season)), {}).update(enumerate(urls, 1))
+
+    # --- Parcours ---
+    def linked(self):
+        """(id, saison) de tous les films (saison 0) et saisons à ids numériques."""
+        found = {(media_id, 0) for media_id in self.base.movie_ids}
+        found.update(self.base.season_list())
+        for layer in self._changes:
+            found.update((media_id, 0) for media_id in layer["movies"])
+            found.update(layer["seasons"])
+        return found
+
+    def items(self):
+        """(id, saison, épisode, url) : modifications récentes d'abord, puis l'instantané."""
+        seen = set()
+        for layer in self._changes:
+            for media_id, url in layer["movies"].items():
+                if (media_id, 0, 0) not in seen:
+                    seen.add((media_id, 0, 0))
+                    yield media_id, 0, 0, url
+            for (media_id, season), episodes in layer["seasons"].items():
+                for ep, url in episodes.items():
+                    if (media_id, season, ep) not in seen:
+                        seen.add((media_id, season, ep))
+                        yield media_id, season, ep, url
+        for media_id, url in self.base.movies():
+            if (media_id, 0, 0) not in seen:
+                yield media_id, 0, 0, url
+        for media_id, season, ep, url in self.base.episodes_iter():
+            if (media_id, season, ep) not in seen:
+                yield media_id, season, ep, url
+
+    def trailers(self):
+        merged = dict(self.base.trailers())
+        for layer in reversed(self._changes):
+            merged.update(layer["trailers"])
+        return merged
+
+    # --- Instantanés ---
+    def prepare_snapshot(self):
+        """Fige les modifications actuelles et renvoie la fonction qui construit
+        l'instantané correspondant (bytes), à appeler hors de la boucle : elle
+        ne lit que des données qui ne changent plus. Les modifications faites
+        entre-temps restent en mémoire jusqu'à `rebase`."""
+        base, frozen = self.base, self._changes
+        self._changes = [self._layer()] + frozen
+        return lambda: _build(base, frozen)
+
+    def rebase(self, snapshot):
+        """Remplace la base par l'instantané du dernier `prepare_snapshot`."""
+        old, self.base = self.base, snapshot
+        self._changes = self._changes[:1]
+        old.close()
+
+    def close(self):
+        self.base.close()
+
+
+def _season(base, layers, media_id, season):
+    links = base.season(media_id, season)
+    for layer in reversed(layers):
+        links.update(layer["seasons"].get((media_id, season), {}))
+    return links
+
+
+def _build(base, layers):
+    movies, trailers = dict(base.movies()), dict(base.trailers())
+    seasons = set(base.season_list())
+    for layer in reversed(layers):
+        movies.update(layer["movies"])
+        trailers.update(layer["trailers"])
+        seasons.update(layer["seasons"])
+    episodes = ((media_id, season, ep, url)
+                for media_id, season in seasons
+                for ep, url in _season(base, layers, media_id, season).items())
+    return build_snapshot(movies.items(), trailers.items(), episodes)
@@ -0,0 +1,164 @@
+"""Import en masse du catalogue depuis un manifeste CSV ou JSON.
+
+Colonnes (CSV) ou clés (JSON, liste d'objets) :
+    type           film / movie ou serie / tv
+    tmdb_id        identifiant TMDB
+    saison         numéro de saison (séries)
+    liens          lien de lecture (film) ou liens des épisodes séparés par
+                   des espaces, virgules ou « | » (série)
+    bande_annonce  lien de la bande-annonce (films, optionnel)
+
+Utilisation hors du bot :
+    python importer.py manifeste.csv [--backend sqlite|json]
+(avec le stockage JSON, arrêter le bot avant d'importer)
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+
+from dotenv import load_dotenv
+
+from compact import MAX_SEASON
+from ratelimit import TokenBucket
+from storage import open_store
+from tmdb import TMDBClient, media_meta
+
+TYPES = {"film": "movie", "movie": "movie", "serie": "tv", "série": "tv", "tv": "tv"}
+_LINK_SEPARATORS = re.compile(r"[\s,|]+")
+
+
+def parse_manifest(raw, filename):
+    """Renvoie (entrées valides, erreurs). Une erreur est un couple (ligne, message)."""
+    text = raw.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            return [], [(0, f"JSON invalide : {e}")]
+        if not isinstance(rows, list):
+            return [], [(0, "Le JSON doit être une liste d'objets")]
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    entries, errors = [], []
+    for line, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            errors.append((line, "entrée invalide"))
+            continue
+        media_type = TYPES.get(str(row.get("type", "")).strip().lower())
+        tmdb_id = str(row.get("tmdb_id", "")).strip()
+        liens = row.get("liens") or ""
+        links = liens if isinstance(liens, list) else _LINK_SEPARATORS.split(liens.strip())
+        links = [l for l in links if l]
+        if media_type is None:
+            errors.append((line, f"type inconnu : {row.get('type')!r}"))
+            continue
+        if not tmdb_id.isdigit():
+            errors.append((line, f"tmdb_id invalide : {tmdb_id!r}"))
+            continue
+        if not links:
+            errors.append((line, "aucun lien"))
+            continue
+        entry = {"line": line, "type": media_type, "tmdb_id": tmdb_id, "links": links,
+                 "trailer": (row.get("bande_annonce") or "").strip() or None, "season": None}
+        if media_type == "tv":
+            try:
+                entry["season"] = int(row.get("saison"))
+            except (TypeError, ValueError):
+                errors.append((line, f"saison invalide : {row.get('saison')!r}"))
+                continue
+            if not 1 <= entry["season"] <= MAX_SEASON:
+                errors.append((line, f"saison hors limites (1-{MAX_SEASON}) : {entry['season']}"))
+                continue
+        entries.append(entry)
+    return entries, errors
+
+
+async def validate(entries, tmdb, rate=20, burst=20):
+    """Vérifie en parallèle que chaque id existe sur TMDB (débit limité).
+    Renvoie (entrées valides, {(type, id): infos TMDB}, erreurs)."""
+    bucket = TokenBucket(rate, burst)
+    keys = {(e["type"], e["tmdb_id"]) for e in entries}
+
+    async def check(key):
+        await bucket.acquire()
+        return key, await tmdb.details(f"{key[0]}/{key[1]}")
+
+    infos = {key: info for key, info in await asyncio.gather(*map(check, keys)) if info}
+    valid, errors = [], []
+    for e in entries:
+        if (e["type"], e["tmdb_id"]) in infos:
+            valid.append(e)
+        else:
+            errors.append((e["line"], f"introuvable sur TMDB : {e['type']}/{e['tmdb_id']}"))
+    return valid, infos, errors
+
+
+class ImportReport:
+    def __init__(self):
+        self.movies = 0
+        self.seasons = 0
+        self.episodes = 0
+        self.errors = []
+        self.media = []  # (type, id, métadonnées) des médias importés
+        self.imported = []  # (type, id, saison) des liens remplacés (saison 0 : film)
+
+    def summary(self):
+        lines = [f"✅ {self.movies} film(s), {self.seasons} saison(s) ({self.episodes} épisodes) importés."]
+        if self.errors:
+            lines.append(f"⚠️ {len(self.errors)} ligne(s) ignorée(s) :")
+            lines += [f"• ligne {line} : {msg}" for line, msg in self.errors[:15]]
+            if len(self.errors) > 15:
+                lines.append(f"• … et {len(self.errors) - 15} autre(s)")
+        return "\n".join(lines)[:2000]
+
+
+async def run_import(raw, filename, store, tmdb):
+    """Analyse, valide puis écrit tout le manifeste en une seule transaction."""
+    report = ImportReport()
+    entries, report.errors = parse_manifest(raw, filename)
+    valid, infos, errors = await validate(entries, tmdb)
+    report.errors += errors
+    report.errors.sort()
+
+    movies = [(e["tmdb_id"], e["links"][0], e["trailer"]) for e in valid if e["type"] == "movie"]
+    seasons = [(e["tmdb_id"], e["season"], e["links"]) for e in valid if e["type"] == "tv"]
+    report.media = [(t, i, media_meta(info)) for (t, i), info in infos.items()]
+    store.bulk_import(movies, seasons, report.media)
+
+    report.imported = [("movie", i, 0) for i, _, _ in movies] + [("tv", i, s) for i, s, _ in seasons]
+    report.movies = len(movies)
+    report.seasons = len(seasons)
+    report.episodes = sum(len(links) for _, _, links in seasons)
+    return report
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Import en masse du catalogue (CSV ou JSON)")
+    parser.add_argument("manifest")
+    parser.add_argument("--backend", default=os.getenv('STORAGE_BACKEND', "sqlite"), choices=["sqlite", "json"])
+    parser.add_argument("--db", default=os.getenv('DB_PATH', "catalogue.db"))
+    parser.add_argument("--json", default="db_links.json")
+    args = parser.parse_args()
+
+    async def run():
+        tmdb = TMDBClient(os.getenv('TMDB_API_KEY'))
+        store = open_store(args.backend, args.json, args.db)
+        try:
+            with open(args.manifest, "rb") as f:
+                report = await run_import(f.read(), args.manifest, store, tmdb)
+        finally:
+            await tmdb.close()
+            store.close()
+        print(report.summary())
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
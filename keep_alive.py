@@ -1,15 +1,58 @@
-from flask import Flask
-from threading import Thread
+"""Serveur HTTP de supervision, servi par aiohttp sur la boucle du bot
+(aucun thread) : démarré dans setup_hook, arrêté à la fermeture du bot."""
+import time
 
-app = Flask('')
+from aiohttp import web
 
-@app.route('/')
-def home():
-    return "Le bot est en ligne !"
+import metrics
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
\ No newline at end of file
+class KeepAlive:
+    """`health()` -> (en bonne santé ?, détails) ; `status()` -> dict ;
+    `caches` : {nom: TTLCache} exposés sur /cache."""
+
+    def __init__(self, health, status, caches, host="0.0.0.0", port=8080):
+        self.health = health
+        self.status = status
+        self.caches = caches
+        self.host = host
+        self.port = port
+        self.started = time.time()
+        self._runner = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/", self.home)
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/metrics", self.prometheus)
+        app.router.add_get("/status", self.status_page)
+        app.router.add_get("/cache", self.cache_page)
+        return app
+
+    async def home(self, request):
+        return web.Response(text="Le bot est en ligne !")
+
+    async def healthz(self, request):
+        ok, details = self.health()
+        return web.json_response({"status": "ok" if ok else "degraded", **details}, status=200 if ok else 503)
+
+    async def prometheus(self, request):
+        return web.Response(text=metrics.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def status_page(self, request):
+        return web.json_response({"uptime_s": round(time.time() - self.started), **self.status()})
+
+    async def cache_page(self, request):
+        return web.json_response({name: cache.stats() for name, cache in self.caches.items()})
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,262 @@
+"""Vérification en arrière-plan des liens du catalogue.
+
+Tous les liens (épisodes, films, bandes-annonces) sont testés à intervalle
+régulier : HEAD d'abord, puis GET limité au premier octet si le serveur
+refuse HEAD. Un refus d'accès, une limitation ou une erreur serveur (401,
+403, 429, 5xx) ne dit rien du lien : son état reste inconnu, et un
+Retry-After met l'hôte en pause. Les liens signalés sont vérifiés aussitôt ;
+lors des passages complets, les liens récents passent en premier. La fin
+du dernier passage complet est enregistrée : un redémarrage attend la fin
+de l'intervalle, et un passage interrompu reprend sans revérifier les liens
+déjà vus.
+Le résultat est gardé dans un index persistant que les fiches consultent,
+sans aucun appel réseau à l'affichage.
+
+Utilisation hors du bot :
+    python linkcheck.py [--backend sqlite|json]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+RECENT = 7 * 86400         # Liens ajoutés depuis moins de 7 jours : vérifiés en priorité
+DEFINITIVE = (404, 410)    # Pas de seconde chance en GET pour ces statuts
+UNKNOWN = (401, 403, 429)  # Accès refusé ou limité (comme 5xx) : l'état du lien reste inconnu
+MAX_RETRY_WAIT = 60        # Au-delà, un hôte en pause (Retry-After) attend le passage suivant
+LAST_PASS = "linkcheck_last_pass"  # Clé meta : fin du dernier passage complet (horodatage)
+USER_AGENT = "Mozilla/5.0 (compatible; PatheLinkCheck/1.0)"
+
+
+def is_unknown(status):
+    """Réponse qui ne permet de conclure ni que le lien marche, ni qu'il est mort."""
+    return status in UNKNOWN or status >= 500
+
+
+def retry_after(value, now=None):
+    """Délai (secondes) d'un en-tête Retry-After, en secondes ou en date HTTP ; None s'il est illisible."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class LinkChecker:
+    """Un lien est considéré mort après `dead_after` échecs consécutifs
+    (une panne passagère ne masque rien)."""
+
+    def __init__(self, store, on_change=None, concurrency=20, per_host=4, timeout=10,
+                 interval=6 * 3600, dead_after=2, batch=500):
+        self.store = store
+        self.on_change = on_change  # media_id -> None, appelé quand un lien change d'état
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.interval = interval
+        self.dead_after = dead_after
+        self.batch = batch
+        self.health = {}            # url -> (ok, statut, vérifié le, échecs consécutifs)
+        self.checked = 0
+        self._reported = set()
+        self._paused = {}           # hôte -> fin de la pause demandée par Retry-After (monotonic)
+        self._task = None
+        self._checks = set()        # Vérifications de liens signalés en cours
+
+    def load(self):
+        self.health = self.store.link_health()
+
+    def start(self):
+        if self._task is None:
+            self.load()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._checks):
+            task.cancel()
+
+    def is_dead(self, url):
+        entry = self.health.get(url)
+        return entry is not None and entry[3] >= self.dead_after
+
+    def dead_count(self):
+        return sum(1 for entry in self.health.values() if entry[3] >= self.dead_after)
+
+    def report(self, media_id, urls):
+        """Liens signalés : vérifiés tout de suite, sans attendre le prochain passage."""
+        urls = [u for u in urls if u]
+        if urls:
+            self._reported.update(urls)
+            task = asyncio.create_task(self.run_pass([(str(media_id), u, None) for u in urls]))
+            self._checks.add(task)
+            task.add_done_callback(self._check_done)
+
+    def _check_done(self, task):
+        self._checks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Vérification des liens signalés interrompue", exc_info=task.exception())
+
+    # --- Ordonnancement ---
+    def _order(self, links):
+        now = time.time()
+
+        def priority(link):
+            _, url, added_at = link
+            if url in self._reported:
+                return (0, 0)
+            if added_at and now - added_at < RECENT:
+                return (1, -added_at)
+            entry = self.health.get(url)
+            return (2, 0) if entry is None else (3, entry[2])
+
+        # Tri stable : à priorité égale, l'ordre du stockage (récents d'abord) est conservé
+        return sorted(links, key=priority)
+
+    def last_pass(self):
+        """Fin du dernier passage complet (0 : jamais)."""
+        return float(self.store.get_meta(LAST_PASS) or 0)
+
+    async def _run(self):
+        while True:
+            # Pas de nouveau passage complet à chaque redémarrage : on attend la fin de l'intervalle
+            await asyncio.sleep(max(0.0, self.last_pass() + self.interval - time.time()))
+            try:
+                await self.run_pass()
+            except Exception:
+                log.exception("Vérification des liens interrompue")
+                await asyncio.sleep(self.interval)
+
+    async def run_pass(self, links=None):
+        """Vérifie tous les liens (ou ceux de `links` : (media_id, url, ajouté le)).
+        Un passage complet saute les liens déjà vérifiés depuis le précédent
+        (passage interrompu par un redémarrage, liens signalés)."""
+        full = links is None
+        if full:
+            since = self.last_pass()
+            links = [link for link in self.store.all_links()
+                     if (entry := self.health.get(link[1])) is None or entry[2] <= since]
+        queue = asyncio.Queue()
+        seen = set()
+        for media_id, url, added_at in self._order(links):
+            if url not in seen:
+                seen.add(url)
+                queue.put_nowait((media_id, url))
+
+        pending = {}
+        deferred = 0  # Liens remis au passage suivant (hôte en pause)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": USER_AGENT}) as session:
+            async def worker():
+                nonlocal deferred
+                while not queue.empty():
+                    media_id, url = queue.get_nowait()
+                    wait = self._paused.get(urlsplit(url).netloc, 0) - time.monotonic()
+                    if wait > MAX_RETRY_WAIT:
+                        deferred += 1
+                        continue
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    status = await self.probe(session, url)
+                    self._record(media_id, url, status, pending)
+                    if len(pending) >= self.batch:
+                        self._save(pending)
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self._save(pending)
+        if full:
+            self.store.set_meta(LAST_PASS, str(time.time()))
+        log.info("Liens vérifiés : %d, morts : %d, reportés (hôte en pause) : %d",
+                 len(seen), self.dead_count(), deferred)
+
+    async def probe(self, session, url):
+        """Statut HTTP du lien (0 : injoignable). Un Retry-After met l'hôte en pause."""
+        try:
+            async with session.head(url, allow_redirects=True) as resp:
+                if resp.status < 400 or resp.status in DEFINITIVE:
+                    return resp.status
+                if resp.status == 429 or resp.status >= 500:
+                    # Hôte limité ou en panne : pas de second essai en GET
+                    return self._pause(url, resp)
+            # Beaucoup d'hébergeurs refusent HEAD (403, 405...) : GET du premier octet
+            async with session.get(url, allow_redirects=True, headers={"Range": "bytes=0-0"}) as resp:
+                return self._pause(url, resp)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return 0
+
+    def _pause(self, url, resp):
+        """Met l'hôte en pause le temps demandé par Retry-After, s'il y en a un ; renvoie le statut."""
+        delay = retry_after(resp.headers.get("Retry-After")) if is_unknown(resp.status) else None
+        if delay:
+            self._paused[urlsplit(url).netloc] = time.monotonic() + delay
+        return resp.status
+
+    def _record(self, media_id, url, status, pending):
+        ok = 0 < status < 400
+        previous = self.health.get(url)
+        was_dead = self.is_dead(url)
+        failures = previous[3] if previous else 0
+        if is_unknown(status):
+            # Rien de concluant : le compte d'échecs (et donc l'état mort) est inchangé
+            ok = bool(previous and previous[0])
+        else:
+            failures = 0 if ok else failures + 1
+        self.health[url] = pending[url] = (ok, status, time.time(), failures)
+        self._reported.discard(url)
+        self.checked += 1
+        if was_dead != self.is_dead(url) and self.on_change is not None:
+            self.on_change(media_id)
+
+    def _save(self, pending):
+        if pending:
+            self.store.set_link_health(dict(pending))
+            pending.clear()
+
+
+def main():
+    from storage import open_store
+
+    if os.path.exists('.env'):
+        from dotenv import load_dotenv
+        load_dotenv()
+    parser = argparse.ArgumentParser(description="Vérifie tous les liens du catalogue")
+    parser.add_argument("--backend", default=os.getenv('STORAGE_BACKEND', "sqlite"), choices=["sqlite", "json"])
+    parser.add_argument("--db", default=os.getenv('DB_PATH', "catalogue.db"))
+    parser.add_argument("--json", default="db_links.json")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    async def run():
+        store = open_store(args.backend, args.json, args.db)
+        checker = LinkChecker(store, concurrency=args.concurrency)
+        try:
+            checker.load()
+            await checker.run_pass()
+        finally:
+            store.close()
+        failed = [url for url, (ok, *_) in checker.health.items() if not ok]
+        print(f"{checker.checked} lien(s) vérifié(s), {len(failed)} en échec dont {checker.dead_count()} mort(s)")
+        for url in failed:
+            print(f"  {'✗' if checker.is_dead(url) else '?'} {checker.health[url][1]} {url}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
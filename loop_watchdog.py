@@ -0,0 +1,107 @@
+"""Surveillance des blocages de la boucle asyncio.
+
+Une tâche « battement » note l'heure à intervalle régulier ; un thread
+vérifie que le battement avance. Si la boucle reste bloquée plus de
+`threshold` secondes, la pile du thread de la boucle est capturée et
+journalisée, avec l'interaction en cours de traitement si elle est
+retrouvée dans la pile.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+import discord
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+
+def _find_interaction(frame):
+    """Première interaction Discord trouvée dans les variables locales de la pile."""
+    while frame is not None:
+        for value in list(frame.f_locals.values()):
+            if isinstance(value, discord.Interaction):
+                return value
+        frame = frame.f_back
+    return None
+
+
+def describe_interaction(interaction):
+    if interaction is None:
+        return "aucune interaction"
+    if interaction.command is not None:
+        target = f"/{interaction.command.qualified_name}"
+    else:
+        target = (interaction.data or {}).get("custom_id", "?")
+    return f"{interaction.type.name} {target} (utilisateur {interaction.user.id})"
+
+
+class LoopWatchdog:
+    def __init__(self, threshold=0.25, interval=0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """À appeler depuis la boucle surveillée."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            metrics.LOOP_LAG.set(max(0.0, self._beat - start - self.interval))
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold:
+                if reported is not None:
+                    log.warning("Boucle débloquée après %.2fs", beat - reported)
+                    reported = None
+                continue
+            if reported is not None:
+                continue  # blocage déjà signalé
+            reported = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            log.warning("Boucle bloquée depuis plus de %.2fs pendant %s :\n%s",
+                        self.threshold, describe_interaction(_find_interaction(frame)), stack)
+
+    # --- Mode debug asyncio ---
+    @property
+    def debug(self):
+        return self._loop is not None and self._loop.get_debug()
+
+    def set_debug(self, enabled, slow_callback=0.1):
+        """Active le mode debug d'asyncio (callbacks lents journalisés par le
+        logger « asyncio »), sans redémarrage."""
+        self._loop.slow_callback_duration = slow_callback
+        self._loop.set_debug(enabled)
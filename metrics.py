@@ -0,0 +1,176 @@
+"""Métriques internes (compteurs, jauges, histogrammes) au format texte
+Prometheus, exposées par le serveur keep_alive sur /metrics."""
+import asyncio
+import functools
+import inspect
+import math
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format(name, labels, value):
+    if labels:
+        escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+        name += "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return f"{name} NaN"
+        if math.isinf(value):
+            return f"{name} {'+' if value > 0 else '-'}Inf"
+        # repr : toute la précision (`:g` arrondit à 6 chiffres les grands compteurs)
+        return f"{name} {value!r}"
+    return f"{name} {value}"
+
+
+class Counter:
+    """Compteur incrémenté par `inc`, ou lu à chaque export par `fn` (nombre
+    ou liste de couples (labels, valeur)) quand le total est tenu ailleurs."""
+    kind = "counter"
+
+    def __init__(self, name, help, fn=None):
+        self.name, self.help = name, help
+        self.values = {}
+        self.fn = fn
+
+    def inc(self, amount=1, **labels):
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        if self.fn is None:
+            return [_format(self.name, k, v) for k, v in list(self.values.items())]
+        value = self.fn()
+        if isinstance(value, (int, float)):
+            return [_format(self.name, (), value)]
+        return [_format(self.name, _labels(labels), v) for labels, v in value]
+
+
+class Gauge(Counter):
+    """Jauge fixée par `set`, ou calculée à la lecture par `fn` (nombre ou
+    liste de couples (labels, valeur))."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.values[_labels(labels)] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.values = {}  # labels -> [compte par seuil..., somme, total]
+
+    def observe(self, value, **labels):
+        key = _labels(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[idx] += 1
+                break
+        entry[-2] += value
+        entry[-1] += 1
+
+    def samples(self):
+        lines = []
+        for key, entry in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(_format(f"{self.name}_bucket", key + (("le", "+Inf" if bound == math.inf else f"{bound:g}"),), cumulative))
+            lines.append(_format(f"{self.name}_sum", key, entry[-2]))
+            lines.append(_format(f"{self.name}_count", key, entry[-1]))
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines += metric.samples()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, fn=None):
+    return REGISTRY.register(Counter(name, help, fn))
+
+def gauge(name, help, fn=None):
+    return REGISTRY.register(Gauge(name, help, fn))
+
+def histogram(name, help, buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, buckets))
+
+def render():
+    return REGISTRY.render()
+
+
+INTERACTION_SECONDS = histogram("pathe_interaction_seconds", "Durée des commandes, composants et formulaires")
+INTERACTION_ERRORS = counter("pathe_interaction_errors_total", "Interactions terminées par une exception")
+HTTP_SECONDS = histogram("pathe_http_request_seconds", "Durée des requêtes HTTP sortantes")
+HTTP_ERRORS = counter("pathe_http_errors_total", "Requêtes HTTP sortantes en échec")
+STORAGE_SECONDS = histogram("pathe_storage_seconds", "Durée des opérations de stockage",
+                            buckets=(0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS)
+STORAGE_ERRORS = counter("pathe_storage_errors_total", "Opérations de stockage en échec")
+OPERATION_SECONDS = histogram("pathe_operation_seconds", "Durée des recherches et rendus de fiches")
+LOOP_LAG = gauge("pathe_event_loop_lag_seconds", "Retard de la boucle asyncio (dernière mesure du watchdog)")
+
+
+@contextmanager
+def timer(histogram, errors=None, **labels):
+    """Mesure la durée du bloc ; une exception est comptée dans `errors`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def timed(histogram, errors=None, **labels):
+    """Décorateur de coroutine : équivalent de `timer` autour de chaque appel."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with timer(histogram, errors, **labels):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument(obj, histogram, errors=None, label="op"):
+    """Chronomètre toutes les méthodes publiques (synchrones) d'un objet."""
+    def wrap(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with timer(histogram, errors, **{label: name}):
+                return method(*args, **kwargs)
+        return wrapper
+
+    for name in dir(obj):
+        method = getattr(obj, name)
+        if not name.startswith("_") and inspect.ismethod(method) and not asyncio.iscoroutinefunction(method):
+            setattr(obj, name, wrap(name, method))
+    return obj
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+
+import discord
+
+from cards import digest_embed, notification_embed
+from ratelimit import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+    """File d'envoi des notifications d'ajout, traitée en arrière-plan.
+
+    Les ajouts arrivés dans une même fenêtre de `window` secondes sont
+    regroupés : une notification détaillée pour un seul titre, un
+    récapitulatif (« 12 nouveaux titres ajoutés ») au-delà. Les envois
+    respectent un débit par salon et sont réessayés avec un délai croissant.
+    """
+
+    def __init__(self, bot, channel_id, tmdb, watch_view, window=3.0, max_retries=5):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.tmdb = tmdb
+        self.watch_view = watch_view  # (type, id) -> vue du bouton « Regarder »
+        self.window = window
+        self.max_retries = max_retries
+        # Discord autorise environ 5 messages par 5 secondes et par salon
+        self.bucket = TokenBucket(rate=1, burst=5)
+        self.queue = asyncio.Queue()
+        self.sent = 0
+        self.failed = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=10.0):
+        if self._task is not None:
+            # Les ajouts déjà en file sont envoyés avant l'arrêt (au plus `timeout` secondes)
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                log.warning("Arrêt : %d ajout(s) encore en file, non notifié(s)", self.queue.qsize())
+            self._task.cancel()
+            self._task = None
+
+    def put(self, media_type, media_id, author):
+        self.queue.put_nowait((media_type, str(media_id), author))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(batch)
+            except Exception:
+                self.failed += 1
+                log.exception("Notification de %d ajout(s) perdue", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _deliver(self, batch):
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            return
+        # Un même titre ajouté plusieurs fois (saisons successives...) n'apparaît qu'une fois
+        items = list({(t, i): a for t, i, a in batch}.items())
+        authors = ", ".join(dict.fromkeys(a.name for _, a in items))
+
+        if len(items) == 1:
+            (media_type, media_id), _ = items[0]
+            info = await self.tmdb.details(f"{media_type}/{media_id}")
+            await self._send(channel, embed=notification_embed(info, media_type, media_id, authors),
+                             view=self.watch_view(media_type, media_id))
+            return
+
+        infos = await asyncio.gather(*(self.tmdb.details(f"{t}/{i}") for (t, i), _ in items))
+        titles = [(t, info.get('title') or info.get('name') or i) for ((t, i), _), info in zip(items, infos)]
+        await self._send(channel, embed=digest_embed(titles, authors))
+
+    async def _send(self, channel, **kwargs):
+        for attempt in range(self.max_retries):
+            await self.bucket.acquire()
+            try:
+                await channel.send(**kwargs)
+                self.sent += 1
+                return
+            except discord.RateLimited as e:
+                delay = e.retry_after
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    raise
+                delay = 2 ** attempt
+            log.warning("Envoi de notification refusé, nouvel essai dans %.1fs", delay)
+            await asyncio.sleep(delay)
+        raise RuntimeError(f"abandon après {self.max_retries} essais")
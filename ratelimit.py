@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Limiteur de débit : `rate` jetons par seconde, au plus `burst` d'avance."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Prend un jeton s'il y en a un de disponible, sans attendre."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, max_wait=None):
+        """Réserve un jeton et attend son tour. Renvoie le temps d'attente
+        (secondes), ou None sans rien réserver si l'attente dépasserait `max_wait`."""
+        self._refill()
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if max_wait is not None and delay > max_wait:
+            self.tokens += 1
+            return None
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """Coupe-circuit : après `threshold` échecs consécutifs (erreurs ou appels
+    plus lents que `slow_call`), les appels sont refusés pendant `reset_timeout`
+    secondes, puis un appel d'essai est autorisé (état semi-ouvert). Un essai
+    resté sans résultat pendant `reset_timeout` secondes est considéré perdu :
+    un nouvel essai est alors autorisé."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=5, reset_timeout=30.0, slow_call=5.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.trips = 0
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        elif now - self.probe_at < self.reset_timeout:
+            # Semi-ouvert : un seul appel d'essai à la fois
+            return False
+        self.probe_at = now
+        return True
+
+    def release(self):
+        """Appel autorisé mais abandonné sans résultat (annulation) : l'essai
+        en cours, s'il y en a un, est libéré pour le suivant."""
+        if self.state == self.HALF_OPEN:
+            self.probe_at = 0.0
+
+    def record(self, ok, duration=0.0):
+        if ok and duration < self.slow_call:
+            self.failures = 0
+            self.state = self.CLOSED
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class ReportBoard:
+    """Signalements de liens agrégés par (type, id, saison).
+
+    Un clic sur « Signaler un lien » ne fait que compter le signalement en
+    mémoire (un seul par utilisateur et par élément). Toutes les `interval`
+    secondes, les éléments modifiés sont enregistrés et leur message
+    récapitulatif dans le salon du staff est créé ou modifié sur place.
+    """
+
+    def __init__(self, bot, channel_id, store, title, interval=30.0):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.store = store
+        self.title = title  # (type, id) -> titre (coroutine)
+        self.interval = interval
+        self.reports = {}   # (type, id, saison) -> signalement (dict, cf. store.get_reports)
+        self._dirty = set()
+        self._task = None
+
+    def load(self):
+        self.reports = {(r["media_type"], r["media_id"], r["season"]): r for r in self.store.get_reports()}
+        # Enregistrés sans avoir été publiés (arrêt ou erreur Discord) : publiés au prochain passage
+        self._dirty = {key for key, r in self.reports.items() if r["message_id"] is None}
+
+    def start(self):
+        if self._task is None:
+            self.load()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=10.0):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Dernière publication : les signalements des dernières secondes ont leur message
+        dirty = set(self._dirty)
+        try:
+            await asyncio.wait_for(self.publish(), timeout)
+        except Exception:
+            log.exception("Dernière publication des signalements échouée")
+            self._dirty |= dirty
+        self._save()
+
+    def add(self, media_type, media_id, season, user_id):
+        """Compte un signalement ; False si cet utilisateur l'avait déjà fait."""
+        key = (media_type, str(media_id), int(season))
+        report = self.reports.get(key)
+        if report is None:
+            report = self.reports[key] = {"media_type": key[0], "media_id": key[1], "season": key[2],
+                                          "titre": None, "reporters": [], "message_id": None, "updated_at": 0}
+        if str(user_id) in report["reporters"]:
+            return False
+        report["reporters"].append(str(user_id))
+        report["updated_at"] = time.time()
+        self._dirty.add(key)
+        return True
+
+    async def resolve(self, media_type, media_id, season):
+        """Liens remplacés : le récapitulatif est marqué résolu et le compteur remis à zéro."""
+        key = (media_type, str(media_id), int(season))
+        report = self.reports.pop(key, None)
+        self._dirty.discard(key)
+        if report is None:
+            return
+        self.store.delete_report(*key)
+        if report["message_id"]:
+            try:
+                await self._channel().get_partial_message(report["message_id"]).edit(
+                    content=f"✅ **Résolu** : {self._label(report)} - {len(report['reporters'])} signalement(s)"
+                )
+            except (AttributeError, discord.HTTPException):
+                pass
+
+    @staticmethod
+    def _label(report):
+        titre = report["titre"] or report["media_id"]
+        if report["season"]:
+            titre = f"{titre} - Saison {report['season']}"
+        return f"{titre} (ID: {report['media_id']})"
+
+    def _channel(self):
+        return self.bot.get_channel(self.channel_id)
+
+    def _save(self):
+        if self._dirty:
+            self.store.save_reports([self.reports[k] for k in self._dirty if k in self.reports])
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception:
+                log.exception("Publication des signalements échouée")
+
+    async def publish(self):
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            report = self.reports.get(key)
+            if report is None:
+                continue
+            if report["titre"] is None:
+                report["titre"] = await self.title(report["media_type"], report["media_id"])
+            try:
+                await self._post(report)
+            except discord.HTTPException as e:
+                # Réessayé au prochain passage
+                log.warning("Récapitulatif de signalement non publié : %r", e)
+                self._dirty.add(key)
+        if dirty:
+            self.store.save_reports([self.reports[k] for k in dirty if k in self.reports])
+
+    async def _post(self, report):
+        channel = self._channel()
+        if channel is None:
+            return
+        content = (f"🚩 **Signalement** : {self._label(report)} - "
+                   f"**{len(report['reporters'])}** signalement(s), dernier <t:{int(report['updated_at'])}:R>")
+        if report["message_id"]:
+            try:
+                await channel.get_partial_message(report["message_id"]).edit(content=content)
+                return
+            except discord.NotFound:
+                pass  # Message supprimé par le staff : on en publie un nouveau
+        report["message_id"] = (await channel.send(content)).id
@@ -0,0 +1,138 @@
+import asyncio
+import math
+
+from cache import TTLCache
+
+PAGER_TTL = 10 * 60     # Durée de vie d'une recherche en cache (secondes)
+MAX_TMDB_PAGES = 10     # TMDB renvoie 20 résultats par page
+MAX_LOCAL_RESULTS = 45  # Résultats au plus tirés de l'index local
+LOCAL_MIN_SCORE = 1.0   # Meilleur score local requis pour se passer de TMDB (voir TitleIndex.scored)
+
+
+class SearchPager:
+    """Résultats films/séries d'une recherche TMDB, chargés page par page.
+
+    Les pages TMDB sont récupérées à la demande ; `prefetch` charge en
+    arrière-plan celles nécessaires à la page d'affichage suivante.
+    """
+
+    def __init__(self, tmdb, query, page_size):
+        self.tmdb = tmdb
+        self.query = query
+        self.page_size = page_size
+        self.results = []
+        self.fetched = 0        # Nombre de pages TMDB récupérées
+        self.total_pages = 1    # Selon TMDB (plafonné)
+        self.total_results = 0  # Selon TMDB (personnes comprises)
+        self.raw_seen = 0
+        self._lock = asyncio.Lock()
+        self._prefetch = None
+
+    @property
+    def exhausted(self):
+        return self.fetched >= self.total_pages
+
+    async def _fetch_next(self):
+        data = await self.tmdb.search_page(self.query, self.fetched + 1)
+        if not data:
+            # Erreur TMDB : on réessaiera au prochain affichage
+            return False
+        raw = data.get('results', [])
+        self.fetched += 1
+        self.total_pages = min(data.get('total_pages', 1), MAX_TMDB_PAGES)
+        self.total_results = data.get('total_results', 0)
+        self.raw_seen += len(raw)
+        self.results.extend(r for r in raw if r.get('media_type') in ['movie', 'tv'])
+        return True
+
+    async def ensure(self, count):
+        """Charge des pages TMDB jusqu'à avoir `count` résultats (ou la fin)."""
+        async with self._lock:
+            while len(self.results) < count and not self.exhausted:
+                if not await self._fetch_next():
+                    break
+
+    def estimated_total(self):
+        if self.exhausted or not self.raw_seen:
+            return len(self.results)
+        # Les personnes sont filtrées : on extrapole la proportion observée
+        ratio = len(self.results) / self.raw_seen
+        cap = MAX_TMDB_PAGES * 20
+        return max(len(self.results), round(min(self.total_results, cap) * ratio))
+
+    def page_count(self):
+        return max(1, math.ceil(self.estimated_total() / self.page_size))
+
+    async def page(self, n):
+        """Résultats de la page d'affichage n (ramenée dans les bornes) et son numéro."""
+        if n < 0:
+            # Dernière page : il faut tout charger pour la connaître
+            await self.ensure(math.inf)
+            n = self.page_count() - 1
+        await self.ensure((n + 1) * self.page_size)
+        n = max(0, min(n, self.page_count() - 1))
+        start = n * self.page_size
+        return self.results[start:start + self.page_size], n
+
+    def prefetch(self, n):
+        """Précharge en arrière-plan la page d'affichage n."""
+        if self.exhausted or len(self.results) >= (n + 1) * self.page_size:
+            return
+        if self._prefetch is None or self._prefetch.done():
+            self._prefetch = asyncio.ensure_future(self.ensure((n + 1) * self.page_size))
+
+
+class LocalPager:
+    """Résultats trouvés dans l'index local du catalogue, déjà tous en mémoire."""
+    exhausted = True
+
+    def __init__(self, results, page_size):
+        self.results = results
+        self.page_size = page_size
+
+    def estimated_total(self):
+        return len(self.results)
+
+    def page_count(self):
+        return max(1, math.ceil(len(self.results) / self.page_size))
+
+    async def page(self, n):
+        if n < 0:
+            n = self.page_count() - 1
+        n = max(0, min(n, self.page_count() - 1))
+        start = n * self.page_size
+        return self.results[start:start + self.page_size], n
+
+    def prefetch(self, n):
+        pass
+
+
+class SearchPagers:
+    """Pagination des recherches : l'index local quand il a une correspondance
+    franche (titre identique ou mots en préfixe), TMDB sinon : un titre
+    seulement voisin au catalogue ne doit pas masquer le titre cherché, absent
+    du catalogue mais présent sur TMDB. Les recherches TMDB sont gardées en cache."""
+
+    def __init__(self, tmdb, page_size, index=None, maxsize=256):
+        self.tmdb = tmdb
+        self.page_size = page_size
+        self.index = index
+        self.cache = TTLCache(maxsize=maxsize)
+
+    def get(self, query):
+        if self.index is not None:
+            hits = self.index.scored(query, limit=MAX_LOCAL_RESULTS)
+            if hits and hits[0][1] >= LOCAL_MIN_SCORE:
+                results = [
+                    {"media_type": e["media_type"], "id": e["id"],
+                     "title": f"{e['title']} ({e['year']})" if e["year"] else e["title"]}
+                    for e, _ in hits
+                ]
+                return LocalPager(results, self.page_size)
+
+        key = query.strip().lower()
+        pager = self.cache.get(key)
+        if pager is None:
+            pager = SearchPager(self.tmdb, query, self.page_size)
+            self.cache.set(key, pager, PAGER_TTL)
+        return pager
@@ -0,0 +1,775 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+
+import metrics
+from compact import CompactLinks, Favorite, Snapshot, check_season
+
+log = logging.getLogger(__name__)
+
+# Format historique des clés de db_links.json : "{id}" pour un film,
+# "{id}_S{saison}_E{episode}" pour un épisode.
+_EPISODE_KEY = re.compile(r"^(?P<id>[^_]+)_S(?P<season>\d+)_E(?P<episode>\d+)$")
+
+
+def parse_link_key(key):
+    """ "123_S1_E2" -> ("123", 1, 2) ; "123" -> ("123", 0, 0)"""
+    m = _EPISODE_KEY.match(key)
+    if m:
+        return m["id"], int(m["season"]), int(m["episode"])
+    return key, 0, 0
+
+
+def link_key(media_id, season=0, episode=0):
+    # Un épisode (même de saison 0) ne doit jamais prendre la clé du film
+    if season or episode:
+        return f"{media_id}_S{season}_E{episode}"
+    return str(media_id)
+
+
+def empty_db():
+    return {"links": {}, "trailers": {}, "favorites": {}, "banned_users": [], "media": {}, "views": {}, "link_health": {}, "reports": {}, "meta": {}}
+
+
+def snapshot_path(path):
+    """Instantané binaire des liens associé à db_links.json (cf. compact.py).
+    Les deux fichiers vont ensemble : copiés, sauvegardés et versionnés ensemble."""
+    return os.path.splitext(path)[0] + ".snap"
+
+
+def open_snapshot(path):
+    """Instantané référencé par db_links.json. Son absence est une erreur :
+    continuer sans lui ferait perdre tous les liens à la prochaine écriture."""
+    snap = snapshot_path(path)
+    if not os.path.exists(snap):
+        raise FileNotFoundError(f"{snap} introuvable alors que {path} y fait référence (liens du catalogue) ; "
+                                f"restaurer ce fichier avant de relancer le bot")
+    return Snapshot.open(snap)
+
+
+def read_json_db(path, expand_snapshot=True):
+    """Lit db_links.json (y compris l'ancien format « liens seuls »).
+
+    Les liens à ids numériques sont dans l'instantané binaire quand
+    `links_snapshot` est présent ; `expand_snapshot` les remet dans "links"
+    et "trailers" comme dans l'ancien format."""
+    if not os.path.exists(path):
+        return empty_db()
+    with open(path, "r", encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError:
+            return empty_db()
+    if "links" not in data:
+        data = {"links": data, "trailers": {}, "favorites": {}, "banned_users": []}
+    for k, v in empty_db().items():
+        data.setdefault(k, v)
+    if expand_snapshot and data.pop("links_snapshot", None):
+        snapshot = open_snapshot(path)
+        try:
+            for media_id, season, episode, url in CompactLinks(snapshot).items():
+                data["links"][link_key(media_id, season, episode)] = url
+            data["trailers"].update((str(media_id), url) for media_id, url in snapshot.trailers())
+        finally:
+            snapshot.close()
+    return data
+
+
+def write_json_atomic(path, text):
+    """Écrit dans un fichier temporaire puis le renomme : jamais de fichier à moitié écrit."""
+    write_bytes_atomic(path, text.encode('utf-8'))
+
+
+def write_bytes_atomic(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".db_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# Un film et une série peuvent partager un id TMDB : le type fait partie de la clé
+FAVORITES_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id          INTEGER PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    media_id    TEXT NOT NULL,
+    titre       TEXT NOT NULL,
+    media_type  TEXT,
+    poster_path TEXT,
+    year        TEXT,
+    UNIQUE (user_id, media_id, media_type)
+);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    media_id TEXT NOT NULL,
+    season   INTEGER NOT NULL DEFAULT 0,
+    episode  INTEGER NOT NULL DEFAULT 0,
+    url      TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (media_id, season, episode)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_added_at ON links(added_at);
+
+CREATE TABLE IF NOT EXISTS trailers (
+    media_id TEXT PRIMARY KEY,
+    url      TEXT NOT NULL
+) WITHOUT ROWID;
+""" + FAVORITES_TABLE.format(name="favorites") + """
+CREATE TABLE IF NOT EXISTS banned_users (
+    user_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+-- Métadonnées TMDB des médias du catalogue (titres, année, genres...)
+CREATE TABLE IF NOT EXISTS media (
+    media_type     TEXT NOT NULL,
+    media_id       TEXT NOT NULL,
+    title          TEXT,
+    original_title TEXT,
+    year           TEXT,
+    poster_path    TEXT,
+    genres         TEXT NOT NULL DEFAULT '[]',
+    added_at       REAL NOT NULL,
+    PRIMARY KEY (media_type, media_id)
+) WITHOUT ROWID;
+
+-- Nombre d'ouvertures de fiche par média (titres à préchauffer au démarrage)
+CREATE TABLE IF NOT EXISTS views (
+    media_type TEXT NOT NULL,
+    media_id   TEXT NOT NULL,
+    count      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (media_type, media_id)
+) WITHOUT ROWID;
+
+-- Dernière vérification de chaque lien (linkcheck) ; failures : échecs consécutifs
+CREATE TABLE IF NOT EXISTS link_health (
+    url        TEXT PRIMARY KEY,
+    ok         INTEGER NOT NULL,
+    status     INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    failures   INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Signalements de liens agrégés par média/saison (saison 0 : film)
+CREATE TABLE IF NOT EXISTS reports (
+    media_type TEXT NOT NULL,
+    media_id   TEXT NOT NULL,
+    season     INTEGER NOT NULL DEFAULT 0,
+    titre      TEXT,
+    reporters  TEXT NOT NULL DEFAULT '[]',
+    message_id INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (media_type, media_id, season)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+
+# Métadonnées gardées avec chaque favori
+FAVORITE_META = ("media_type", "poster_path", "year")
+
+
+class SQLiteStore:
+    """Stockage du catalogue dans un fichier SQLite local (mode WAL).
+    Lectures ponctuelles et upserts au lieu de recharger tout le fichier."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Colonnes ajoutées aux favoris après la première version du schéma
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(favorites)")}
+        with self.conn:
+            for column in FAVORITE_META:
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE favorites ADD COLUMN {column} TEXT")
+        # Ancienne contrainte UNIQUE (user_id, media_id) : la table est reconstruite avec le type
+        uniques = [name for _, name, unique, *_ in self.conn.execute("PRAGMA index_list(favorites)") if unique]
+        if any([row[2] for row in self.conn.execute(f"PRAGMA index_info({name})")] == ["user_id", "media_id"]
+               for name in uniques):
+            with self.conn:
+                self.conn.execute(FAVORITES_TABLE.format(name="favorites_new"))
+                self.conn.execute(
+                    "INSERT INTO favorites_new (id, user_id, media_id, titre, media_type, poster_path, year)"
+                    " SELECT id, user_id, media_id, titre, media_type, poster_path, year FROM favorites"
+                )
+                self.conn.execute("DROP TABLE favorites")
+                self.conn.execute("ALTER TABLE favorites_new RENAME TO favorites")
+
+    def close(self):
+        self.conn.close()
+
+    async def aclose(self):
+        self.close()
+
+    # --- Import ---
+    def import_json(self, json_path):
+        """Importe une seule fois le contenu de db_links.json."""
+        if self._get_meta("json_imported"):
+            return False
+        data = read_json_db(json_path)
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO links (media_id, season, episode, url, added_at) VALUES (?, ?, ?, ?, ?)",
+                [(*parse_link_key(k), url, now) for k, url in data["links"].items()],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO trailers (media_id, url) VALUES (?, ?)",
+                data["trailers"].items(),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO favorites (user_id, media_id, titre, media_type, poster_path, year)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(uid, str(f['id']), f['titre'], *(f.get(k) for k in FAVORITE_META))
+                 for uid, favs in data["favorites"].items() for f in favs],
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO banned_users (user_id) VALUES (?)",
+                [(str(u),) for u in data["banned_users"]],
+            )
+            for key, meta in data["media"].items():
+                self._upsert_media(*key.split(":", 1), meta, meta.get("added_at", now))
+            self._add_views((*key.split(":", 1), count) for key, count in data["views"].items())
+            self._set_link_health((url, *health) for url, health in data["link_health"].items())
+            self._save_reports(
+                dict(report, media_type=t, media_id=i, season=int(s))
+                for (t, i, s), report in ((key.split(":"), r) for key, r in data["reports"].items())
+            )
+            self._set_meta("json_imported", str(now))
+        return True
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_meta(self, key):
+        return self._get_meta(key)
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self._set_meta(key, value)
+
+    # --- Liens ---
+    def get_link(self, media_id):
+        return self.get_episode_link(media_id, 0, 0)
+
+    def get_episode_link(self, media_id, season, episode):
+        row = self.conn.execute(
+            "SELECT url FROM links WHERE media_id = ? AND season = ? AND episode = ?",
+            (str(media_id), int(season), int(episode)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_season_links(self, media_id, season):
+        """Tous les liens d'une saison en une requête : {episode: url}."""
+        rows = self.conn.execute(
+            "SELECT episode, url FROM links WHERE media_id = ? AND season = ?",
+            (str(media_id), int(season)),
+        )
+        return dict(rows)
+
+    def get_trailer(self, media_id):
+        row = self.conn.execute("SELECT url FROM trailers WHERE media_id = ?", (str(media_id),)).fetchone()
+        return row[0] if row else None
+
+    def set_movie(self, media_id, url, trailer=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO links (media_id, season, episode, url, added_at) VALUES (?, 0, 0, ?, ?)",
+                (str(media_id), url, time.time()),
+            )
+            if trailer:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO trailers (media_id, url) VALUES (?, ?)", (str(media_id), trailer)
+                )
+
+    def set_season(self, media_id, season, urls):
+        """Enregistre les liens des épisodes 1..n d'une saison."""
+        check_season(int(season))
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO links (media_id, season, episode, url, added_at) VALUES (?, ?, ?, ?, ?)",
+                [(str(media_id), int(season), ep, url, now) for ep, url in enumerate(urls, 1)],
+            )
+
+    def bulk_import(self, movies=(), seasons=(), media=()):
+        """Import en masse en une seule transaction.
+        movies : (id, url, bande-annonce) ; seasons : (id, saison, urls) ; media : (type, id, métadonnées)"""
+        seasons = list(seasons)
+        for _, season, _ in seasons:
+            check_season(int(season))
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO links (media_id, season, episode, url, added_at) VALUES (?, 0, 0, ?, ?)",
+                [(str(media_id), url, now) for media_id, url, _ in movies],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO trailers (media_id, url) VALUES (?, ?)",
+                [(str(media_id), trailer) for media_id, _, trailer in movies if trailer],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO links (media_id, season, episode, url, added_at) VALUES (?, ?, ?, ?, ?)",
+                [(str(media_id), int(season), ep, url, now)
+                 for media_id, season, urls in seasons for ep, url in enumerate(urls, 1)],
+            )
+            for media_type, media_id, meta in media:
+                self._upsert_media(media_type, media_id, meta, now)
+
+    # --- Favoris ---
+    def get_favorites(self, user_id):
+        rows = self.conn.execute(
+            "SELECT media_id, titre, media_type, poster_path, year FROM favorites WHERE user_id = ? ORDER BY id",
+            (str(user_id),),
+        )
+        return [
+            {"id": media_id, "titre": titre, "media_type": media_type, "poster_path": poster, "year": year}
+            for media_id, titre, media_type, poster, year in rows
+        ]
+
+    def toggle_favorite(self, user_id, fav):
+        """Ajoute ou retire un favori ({"id", "titre", "media_type", ...}).
+        Le favori retiré est celui du même type (ou un ancien favori sans type).
+        Renvoie True s'il a été ajouté."""
+        with self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM favorites WHERE user_id = ? AND media_id = ? AND (media_type = ? OR media_type IS NULL)",
+                (str(user_id), str(fav['id']), fav.get('media_type'))
+            )
+            if cur.rowcount:
+                return False
+            self.conn.execute(
+                "INSERT INTO favorites (user_id, media_id, titre, media_type, poster_path, year)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (str(user_id), str(fav['id']), fav['titre'], *(fav.get(k) for k in FAVORITE_META)),
+            )
+            return True
+
+    def untyped_favorites(self):
+        """{id: titre} des favoris enregistrés sans type de média (anciennes entrées)."""
+        rows = self.conn.execute("SELECT media_id, titre FROM favorites WHERE media_type IS NULL")
+        return dict(rows)
+
+    def update_favorites(self, media_id, meta):
+        """Complète les favoris encore sans type d'un média, chez tous les utilisateurs
+        (les favoris déjà typés, peut-être de l'autre type, ne sont pas touchés)."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE favorites SET media_type = ?, poster_path = ?, year = ? WHERE media_id = ? AND media_type IS NULL",
+                (*(meta.get(k) for k in FAVORITE_META), str(media_id)),
+            )
+
+    # --- Utilisateurs bannis ---
+    def banned_users(self):
+        return [row[0] for row in self.conn.execute("SELECT user_id FROM banned_users")]
+
+    # --- Métadonnées ---
+    def _upsert_media(self, media_type, media_id, meta, added_at):
+        self.conn.execute(
+            "INSERT INTO media (media_type, media_id, title, original_title, year, poster_path, genres, added_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (media_type, media_id) DO UPDATE SET title = excluded.title,"
+            " original_title = excluded.original_title, year = excluded.year,"
+            " poster_path = excluded.poster_path, genres = excluded.genres",
+            (media_type, str(media_id), meta.get("title"), meta.get("original_title"), meta.get("year"),
+             meta.get("poster_path"), json.dumps(meta.get("genres", []), ensure_ascii=False), added_at),
+        )
+
+    def upsert_media(self, media_type, media_id, meta):
+        """Enregistre les métadonnées d'un média (la date d'ajout initiale est conservée)."""
+        with self.conn:
+            self._upsert_media(media_type, media_id, meta, time.time())
+
+    def all_media(self):
+        rows = self.conn.execute(
+            "SELECT media_type, media_id, title, original_title, year, poster_path, genres, added_at FROM media"
+        )
+        return [
+            {"media_type": t, "media_id": i, "title": title, "original_title": orig, "year": year,
+             "poster_path": poster, "genres": json.loads(genres), "added_at": added_at}
+            for t, i, title, orig, year, poster, genres, added_at in rows
+        ]
+
+    def linked_media(self):
+        """(type, id) de tous les médias ayant au moins un lien."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT CASE WHEN season = 0 THEN 'movie' ELSE 'tv' END, media_id FROM links"
+        )
+        return set(rows)
+
+    # --- Popularité ---
+    def _add_views(self, rows):
+        self.conn.executemany(
+            "INSERT INTO views (media_type, media_id, count) VALUES (?, ?, ?)"
+            " ON CONFLICT (media_type, media_id) DO UPDATE SET count = count + excluded.count",
+            rows,
+        )
+
+    def add_views(self, counts):
+        """Ajoute les ouvertures de fiches comptées en mémoire : {(type, id): n}."""
+        with self.conn:
+            self._add_views((t, str(i), n) for (t, i), n in counts.items())
+
+    def top_media(self, limit):
+        """(type, id) des médias les plus consultés."""
+        rows = self.conn.execute("SELECT media_type, media_id FROM views ORDER BY count DESC LIMIT ?", (limit,))
+        return list(rows)
+
+    # --- Santé des liens ---
+    def all_links(self):
+        """(id, url, date d'ajout) de tous les liens et bandes-annonces."""
+        return list(self.conn.execute(
+            "SELECT media_id, url, added_at FROM links UNION ALL SELECT media_id, url, 0 FROM trailers"
+        ))
+
+    def link_health(self):
+        """{url: (ok, statut HTTP, vérifié le, échecs consécutifs)}"""
+        rows = self.conn.execute("SELECT url, ok, status, checked_at, failures FROM link_health")
+        return {url: (bool(ok), status, checked_at, failures) for url, ok, status, checked_at, failures in rows}
+
+    def _set_link_health(self, rows):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO link_health (url, ok, status, checked_at, failures) VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+    def set_link_health(self, results):
+        """Enregistre un lot de vérifications : {url: (ok, statut, vérifié le, échecs)}."""
+        with self.conn:
+            self._set_link_health((url, *health) for url, health in results.items())
+
+    # --- Signalements ---
+    def get_reports(self):
+        rows = self.conn.execute(
+            "SELECT media_type, media_id, season, titre, reporters, message_id, updated_at FROM reports"
+        )
+        return [
+            {"media_type": t, "media_id": i, "season": s, "titre": titre, "reporters": json.loads(reporters),
+             "message_id": message_id, "updated_at": updated_at}
+            for t, i, s, titre, reporters, message_id, updated_at in rows
+        ]
+
+    def _save_reports(self, reports):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO reports (media_type, media_id, season, titre, reporters, message_id, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(r["media_type"], str(r["media_id"]), int(r["season"]), r.get("titre"), json.dumps(r["reporters"]),
+              r.get("message_id"), r["updated_at"]) for r in reports],
+        )
+
+    def save_reports(self, reports):
+        with self.conn:
+            self._save_reports(reports)
+
+    def delete_report(self, media_type, media_id, season):
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM reports WHERE media_type = ? AND media_id = ? AND season = ?",
+                (media_type, str(media_id), int(season)),
+            )
+
+
+class MemoryStore:
+    """Catalogue JSON chargé une seule fois en mémoire.
+
+    Les liens sont dans un instantané binaire compact (db_links.snap) lu par
+    mmap ; db_links.json garde le reste et y fait référence : les deux
+    fichiers ne vont pas l'un sans l'autre. Les modifications marquent le
+    catalogue comme modifié ; il est écrit en arrière-plan au plus une fois
+    par `flush_delay` secondes (écriture atomique), et une dernière fois à la
+    fermeture. L'instantané n'est réécrit que si des liens ont changé.
+    """
+
+    def __init__(self, path, flush_delay=5.0):
+        self.path = path
+        self.snapshot_path = snapshot_path(path)
+        self.flush_delay = flush_delay
+        with metrics.timer(metrics.STORAGE_SECONDS, metrics.STORAGE_ERRORS, op="load"):
+            self.db = read_json_db(path, expand_snapshot=False)
+            links, trailers = self.db.pop("links"), self.db.pop("trailers")
+            if self.db.pop("links_snapshot", None):
+                self.links = CompactLinks(open_snapshot(path))
+                self.links.extra, self.links.extra_trailers = links, trailers
+                migrate = False
+            else:
+                # Ancien format : tous les liens dans le JSON, instantané créé à la première écriture
+                self.links = CompactLinks.from_links(links, trailers, parse_link_key)
+                migrate = bool(links or trailers)
+            self.db["favorites"] = {uid: [Favorite.from_dict(f) for f in favs]
+                                    for uid, favs in self.db["favorites"].items()}
+        self.writes = 0
+        self._dirty = False
+        self._timer = None
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+        if migrate:
+            self._mark_dirty()
+
+    def close(self):
+        """Fermeture hors de la boucle (scripts) ; dans le bot, utiliser `aclose`."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self.flush()
+        self.links.close()
+
+    async def aclose(self):
+        """Fermeture depuis la boucle : attend l'écriture en arrière-plan en cours
+        (son thread lit l'instantané), fait la dernière écriture, puis seulement
+        libère l'instantané."""
+        while True:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            task = self._flush_task
+            if task is None or task.done():
+                break
+            # Une écriture échouée se reprogramme : on reboucle pour annuler son délai
+            await asyncio.wait([task])
+        async with self._lock:
+            self.flush()
+        self.links.close()
+
+    # --- Persistance ---
+    def _serialize(self):
+        db = dict(self.db, links=self.links.extra, trailers=self.links.extra_trailers,
+                  links_snapshot=os.path.basename(self.snapshot_path))
+        db["favorites"] = {uid: [f.to_dict() for f in favs] for uid, favs in self.db["favorites"].items()}
+        return json.dumps(db, ensure_ascii=False)
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Hors de la boucle (script, import) : écriture immédiate
+            self.flush()
+            return
+        self._timer = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_task = asyncio.ensure_future(self._flush_async())
+        self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Écriture différée de %s interrompue", self.path, exc_info=task.exception())
+
+    def _write_snapshot(self, build):
+        write_bytes_atomic(self.snapshot_path, build())
+        return Snapshot.open(self.snapshot_path)
+
+    def flush(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            with metrics.timer(metrics.STORAGE_SECONDS, metrics.STORAGE_ERRORS, op="flush"):
+                # L'instantané d'abord : le JSON écrit ensuite y fait référence
+                if self.links.changed or not os.path.exists(self.snapshot_path):
+                    self.links.rebase(self._write_snapshot(self.links.prepare_snapshot()))
+                write_json_atomic(self.path, self._serialize())
+        except Exception:
+            # Rien n'est perdu : les modifications restent à écrire
+            self._dirty = True
+            raise
+        self.writes += 1
+
+    async def _flush_async(self):
+        self._timer = None
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            # Le JSON est sérialisé dans la boucle (instantané cohérent) ; l'instantané
+            # des liens est construit à partir de données figées, dans un thread
+            try:
+                with metrics.timer(metrics.STORAGE_SECONDS, metrics.STORAGE_ERRORS, op="flush"):
+                    if self.links.changed or not os.path.exists(self.snapshot_path):
+                        build = self.links.prepare_snapshot()
+                        self.links.rebase(await asyncio.to_thread(self._write_snapshot, build))
+                    text = self._serialize()
+                    await asyncio.to_thread(write_json_atomic, self.path, text)
+            except Exception:
+                # Modifications gardées, nouvel essai au prochain délai (et à la fermeture)
+                log.exception("Écriture de %s échouée, nouvel essai dans %s s", self.path, self.flush_delay)
+                self._mark_dirty()
+                return
+            self.writes += 1
+
+    # --- Liens ---
+    def get_link(self, media_id):
+        return self.links.get_link(media_id)
+
+    def get_episode_link(self, media_id, season, episode):
+        return self.get_season_links(media_id, season).get(int(episode))
+
+    def get_season_links(self, media_id, season):
+        return self.links.get_season_links(media_id, season)
+
+    def get_trailer(self, media_id):
+        return self.links.get_trailer(media_id)
+
+    def set_movie(self, media_id, url, trailer=None):
+        self.links.set_movie(media_id, url)
+        if trailer:
+            self.links.set_trailer(media_id, trailer)
+        self._mark_dirty()
+
+    def set_season(self, media_id, season, urls):
+        self.links.set_episodes(media_id, season, urls, link_key)
+        self._mark_dirty()
+
+    def bulk_import(self, movies=(), seasons=(), media=()):
+        # Une seule écriture différée pour tout l'import
+        for media_id, url, trailer in movies:
+            self.set_movie(media_id, url, trailer)
+        for media_id, season, urls in seasons:
+            self.set_season(media_id, season, urls)
+        for media_type, media_id, meta in media:
+            self.upsert_media(media_type, media_id, meta)
+
+    # --- Favoris ---
+    def get_favorites(self, user_id):
+        return [f.to_dict() for f in self.db["favorites"].get(str(user_id), [])]
+
+    def toggle_favorite(self, user_id, fav):
+        favs = self.db["favorites"].setdefault(str(user_id), [])
+        media_id, media_type = str(fav['id']), fav.get('media_type')
+        kept = [f for f in favs if f.id != media_id or (f.media_type and f.media_type != media_type)]
+        if len(kept) != len(favs):
+            self.db["favorites"][str(user_id)] = kept
+            self._mark_dirty()
+            return False
+        favs.append(Favorite(media_id, fav['titre'], *(fav.get(k) for k in FAVORITE_META)))
+        self._mark_dirty()
+        return True
+
+    def untyped_favorites(self):
+        return {f.id: f.titre for favs in self.db["favorites"].values() for f in favs if not f.media_type}
+
+    def update_favorites(self, media_id, meta):
+        for favs in self.db["favorites"].values():
+            for f in favs:
+                if f.id == str(media_id) and not f.media_type:
+                    for k in FAVORITE_META:
+                        setattr(f, k, meta.get(k))
+        self._mark_dirty()
+
+    # --- Utilisateurs bannis ---
+    def banned_users(self):
+        return [str(u) for u in self.db["banned_users"]]
+
+    # --- Métadonnées ---
+    def upsert_media(self, media_type, media_id, meta):
+        key = f"{media_type}:{media_id}"
+        previous = self.db["media"].get(key, {})
+        self.db["media"][key] = dict(meta, added_at=previous.get("added_at", time.time()))
+        self._mark_dirty()
+
+    def all_media(self):
+        return [
+            dict(meta, media_type=key.split(":", 1)[0], media_id=key.split(":", 1)[1])
+            for key, meta in self.db["media"].items()
+        ]
+
+    def linked_media(self):
+        found = {("tv" if season else "movie", str(media_id)) for media_id, season in self.links.linked()}
+        for key in self.links.extra:
+            media_id, season, _ = parse_link_key(key)
+            found.add(("tv" if season else "movie", media_id))
+        return found
+
+    # --- Popularité ---
+    def add_views(self, counts):
+        views = self.db["views"]
+        for (media_type, media_id), n in counts.items():
+            key = f"{media_type}:{media_id}"
+            views[key] = views.get(key, 0) + n
+        self._mark_dirty()
+
+    def top_media(self, limit):
+        top = sorted(self.db["views"].items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [tuple(key.split(":", 1)) for key, _ in top]
+
+    # --- Santé des liens ---
+    def all_links(self):
+        # Pas de date d'ajout : liens modifiés depuis le dernier instantané d'abord
+        links = [(str(media_id), url, None) for media_id, _, _, url in self.links.items()]
+        links += [(parse_link_key(key)[0], url, None) for key, url in reversed(self.links.extra.items())]
+        trailers = list(self.links.trailers().items()) + list(self.links.extra_trailers.items())
+        return links + [(str(media_id), url, None) for media_id, url in trailers]
+
+    def link_health(self):
+        return {url: tuple(health) for url, health in self.db["link_health"].items()}
+
+    def set_link_health(self, results):
+        self.db["link_health"].update((url, list(health)) for url, health in results.items())
+        self._mark_dirty()
+
+    # --- Signalements ---
+    def get_reports(self):
+        reports = []
+        for key, report in self.db["reports"].items():
+            media_type, media_id, season = key.split(":")
+            reports.append(dict(report, media_type=media_type, media_id=media_id, season=int(season)))
+        return reports
+
+    def save_reports(self, reports):
+        for r in reports:
+            self.db["reports"][f"{r['media_type']}:{r['media_id']}:{int(r['season'])}"] = {
+                "titre": r.get("titre"), "reporters": list(r["reporters"]),
+                "message_id": r.get("message_id"), "updated_at": r["updated_at"],
+            }
+        self._mark_dirty()
+
+    def delete_report(self, media_type, media_id, season):
+        if self.db["reports"].pop(f"{media_type}:{media_id}:{int(season)}", None) is not None:
+            self._mark_dirty()
+
+    # --- Divers ---
+    def get_meta(self, key):
+        return self.db["meta"].get(key)
+
+    def set_meta(self, key, value):
+        self.db["meta"][key] = value
+        self._mark_dirty()
+
+
+def open_store(backend, json_path, sqlite_path):
+    """Ouvre le stockage choisi : "sqlite" (défaut) ou "json" (en mémoire).
+    Chaque opération publique est chronométrée (métriques pathe_storage_*)."""
+    if backend == "json":
+        store = MemoryStore(json_path)
+    else:
+        store = SQLiteStore(sqlite_path)
+        store.import_json(json_path)
+    return metrics.instrument(store, metrics.STORAGE_SECONDS, metrics.STORAGE_ERRORS)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from compact import MAX_SEASON, CompactLinks, Snapshot, build_snapshot
+from storage import MemoryStore, link_key, parse_link_key, read_json_db
+
+MOVIES = [(550, "https://cdn.example.org/films/fight-club.mp4"), (13, "https://autre.example.net/forrest.mp4")]
+TRAILERS = [(550, "https://www.youtube.com/watch?v=qtRKdVHc-cE")]
+EPISODES = [
+    (1399, 1, 1, "https://cdn.example.org/series/got/s1e1.mp4"),
+    (1399, 1, 3, "https://cdn.example.org/series/got/s1e3.mp4"),
+    (1399, 2, 1, "https://cdn.example.org/series/got/é2.mp4"),
+    (1399, MAX_SEASON, 2, "https://cdn.example.org/series/got/last.mp4"),
+    (1400, 1, 1, "https://cdn.example.org/series/next/s1e1.mp4"),
+]
+
+
+def write(tmp_path, data):
+    path = tmp_path / "links.snap"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_round_trip_through_mmap(tmp_path):
+    snapshot = Snapshot.open(write(tmp_path, build_snapshot(MOVIES, TRAILERS, EPISODES)))
+    try:
+        assert snapshot.movie(550) == MOVIES[0][1]
+        assert snapshot.movie(13) == MOVIES[1][1]
+        assert snapshot.movie(14) is None
+        assert snapshot.trailer(550) == TRAILERS[0][1]
+        assert snapshot.trailer(13) is None
+        assert snapshot.season(1399, 1) == {1: EPISODES[0][3], 3: EPISODES[1][3]}
+        assert snapshot.season(1399, 2) == {1: EPISODES[2][3]}
+        # Dernière saison représentable : ne déborde pas sur l'id suivant
+        assert snapshot.season(1399, MAX_SEASON) == {2: EPISODES[3][3]}
+        assert snapshot.season(1400, 1) == {1: EPISODES[4][3]}
+        assert snapshot.season(1399, 3) == {}
+        assert sorted(snapshot.episodes_iter()) == sorted(EPISODES)
+    finally:
+        snapshot.close()
+
+
+@pytest.mark.parametrize("season", [-1, 0, MAX_SEASON + 1])
+def test_unrepresentable_seasons_are_rejected(season):
+    with pytest.raises(ValueError):
+        build_snapshot([], [], [(5, season, 1, "https://h/x")])
+    with pytest.raises(ValueError):
+        CompactLinks().set_episodes(5, season, ["https://h/x"], link_key)
+
+
+def test_rebase_keeps_changes_made_while_writing(tmp_path):
+    links = CompactLinks(Snapshot(build_snapshot(MOVIES, TRAILERS, EPISODES)))
+    links.set_movie(550, "https://cdn.example.org/films/new.mp4")
+    links.set_episodes(1399, 1, ["https://h/a", "https://h/b"], link_key)
+    build = links.prepare_snapshot()
+    # Écrit pendant la construction de l'instantané : ne doit pas être perdu
+    links.set_movie(42, "https://h/late.mp4")
+    links.rebase(Snapshot.open(write(tmp_path, build())))
+
+    assert links.base.movie(550) == "https://cdn.example.org/films/new.mp4"
+    assert links.base.movie(42) is None
+    assert links.get_link(42) == "https://h/late.mp4"
+    assert links.get_season_links(1399, 1) == {1: "https://h/a", 2: "https://h/b", 3: EPISODES[1][3]}
+    assert links.changed
+    links.close()
+
+
+def test_close_waits_for_background_flush(tmp_path):
+    path = str(tmp_path / "db_links.json")
+    links = {str(i): f"https://cdn.example.org/films/{i}.mp4" for i in range(1, 2000)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"links": links}, f)
+    MemoryStore(path).close()
+
+    async def run():
+        store = MemoryStore(path, flush_delay=0)
+        write = store._write_snapshot
+
+        def slow_write(build):
+            time.sleep(0.2)  # La fermeture arrive pendant la construction de l'instantané
+            return write(build)
+
+        store._write_snapshot = slow_write
+        store.set_season(1399, 2, ["https://h/s2e1.mp4"])
+        store.set_meta("commands_hash", "abc")
+        await asyncio.sleep(0.05)
+        assert store._flush_task is not None and not store._flush_task.done()
+        await store.aclose()
+
+    asyncio.run(run())
+    store = MemoryStore(path)
+    try:
+        assert store.get_season_links(1399, 2) == {1: "https://h/s2e1.mp4"}
+        assert store.get_meta("commands_hash") == "abc"
+        assert store.get_link(1999) == links["1999"]
+    finally:
+        store.close()
+
+
+def test_season_zero_keeps_its_own_key():
+    assert link_key(5, 0, 1) == "5_S0_E1"
+    assert parse_link_key(link_key(5, 0, 1)) == ("5", 0, 1)
+    assert link_key(5) == "5"
+
+
+def test_memory_store_round_trip(tmp_path):
+    path = str(tmp_path / "db_links.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"links": {"550": MOVIES[0][1], "1399_S1_E1": EPISODES[0][3], "5_S0_E1": "https://h/s0"},
+                   "trailers": {"550": TRAILERS[0][1]}}, f)
+    MemoryStore(path).close()  # Migration vers l'instantané
+
+    store = MemoryStore(path)
+    try:
+        assert store.get_link(550) == MOVIES[0][1]
+        assert store.get_season_links(1399, 1) == {1: EPISODES[0][3]}
+        assert store.get_trailer(550) == TRAILERS[0][1]
+    finally:
+        store.close()
+    expanded = read_json_db(path)["links"]
+    assert expanded["550"] == MOVIES[0][1] and expanded["5_S0_E1"] == "https://h/s0"
+
+
+def test_missing_snapshot_is_an_error(tmp_path):
+    path = str(tmp_path / "db_links.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"links": {"550": MOVIES[0][1]}}, f)
+    MemoryStore(path).close()
+    os.remove(tmp_path / "db_links.snap")
+
+    with pytest.raises(FileNotFoundError):
+        MemoryStore(path)
+    with pytest.raises(FileNotFoundError):
+        read_json_db(path)
+    # Rien n'a été réécrit par-dessus
+    assert not os.path.exists(tmp_path / "db_links.snap")
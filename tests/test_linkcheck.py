@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from linkcheck import LAST_PASS, LinkChecker, retry_after  # noqa: E402
+
+URL = "https://cdn.example.org/films/fight-club.mp4"
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Remplace aiohttp.ClientSession : réponses fixées par méthode, appels enregistrés."""
+
+    def __init__(self, head, get=None):
+        self.responses = {"HEAD": head, "GET": get}
+        self.calls = []
+
+    def _request(self, method, url, headers=None):
+        self.calls.append((method, (headers or {}).get("Range")))
+        status, *headers = self.responses[method]
+        return FakeResponse(status, *headers)
+
+    def head(self, url, **kwargs):
+        return self._request("HEAD", url, kwargs.get("headers"))
+
+    def get(self, url, **kwargs):
+        return self._request("GET", url, kwargs.get("headers"))
+
+
+class FakeStore:
+    def __init__(self, links=(), meta=None):
+        self.links = list(links)
+        self.meta = dict(meta or {})
+
+    def all_links(self):
+        return self.links
+
+    def link_health(self):
+        return {}
+
+    def set_link_health(self, results):
+        pass
+
+    def get_meta(self, key):
+        return self.meta.get(key)
+
+    def set_meta(self, key, value):
+        self.meta[key] = value
+
+
+def probe(checker, session):
+    return asyncio.run(checker.probe(session, URL))
+
+
+def test_head_success_needs_no_get():
+    session = FakeSession(head=(200,))
+    assert probe(LinkChecker(FakeStore()), session) == 200
+    assert session.calls == [("HEAD", None)]
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_definitive_head_status_skips_get(status):
+    session = FakeSession(head=(status,))
+    assert probe(LinkChecker(FakeStore()), session) == status
+    assert session.calls == [("HEAD", None)]
+
+
+def test_refused_head_falls_back_to_ranged_get():
+    session = FakeSession(head=(405,), get=(206,))
+    assert probe(LinkChecker(FakeStore()), session) == 206
+    assert session.calls == [("HEAD", None), ("GET", "bytes=0-0")]
+
+
+def test_rate_limited_host_is_paused():
+    checker = LinkChecker(FakeStore())
+    session = FakeSession(head=(429, {"Retry-After": "120"}))
+    assert probe(checker, session) == 429
+    assert session.calls == [("HEAD", None)]
+    assert "cdn.example.org" in checker._paused
+
+
+def test_retry_after_formats():
+    assert retry_after("30") == 30.0
+    assert retry_after("Wed, 21 Oct 2015 07:28:30 GMT", now=1445412480) == 30.0
+    assert retry_after("bientôt") is None
+    assert retry_after(None) is None
+
+
+def test_dead_after_transitions():
+    changes = []
+    checker = LinkChecker(FakeStore(), on_change=changes.append, dead_after=2)
+    pending = {}
+
+    checker._record("550", URL, 404, pending)
+    assert not checker.is_dead(URL) and changes == []
+    # Refus, limitation, panne : état inconnu, le compte d'échecs ne bouge pas
+    for status in (401, 403, 429, 503):
+        checker._record("550", URL, status, pending)
+        assert checker.health[URL][3] == 1
+    checker._record("550", URL, 0, pending)
+    assert checker.is_dead(URL) and changes == ["550"]
+    checker._record("550", URL, 503, pending)
+    assert checker.is_dead(URL) and changes == ["550"]
+    checker._record("550", URL, 200, pending)
+    assert not checker.is_dead(URL) and changes == ["550", "550"]
+    assert pending[URL][:2] == (True, 200)
+
+
+def recording_probe(checker):
+    probed = []
+
+    async def probe(session, url):
+        probed.append(url)
+        return 200
+
+    checker.probe = probe
+    return probed
+
+
+def test_full_pass_skips_links_checked_since_the_last_one():
+    other = "https://cdn.example.org/films/other.mp4"
+    store = FakeStore([("550", URL, None), ("13", other, None)], {LAST_PASS: "1000"})
+    checker = LinkChecker(store)
+    checker.health = {URL: (True, 200, 2000.0, 0)}  # Vu par un passage interrompu
+    probed = recording_probe(checker)
+
+    asyncio.run(checker.run_pass())
+    assert probed == [other]
+    assert float(store.meta[LAST_PASS]) > 2000
+
+
+def test_restart_waits_for_the_interval():
+    store = FakeStore([("550", URL, None)], {LAST_PASS: str(time.time())})
+    checker = LinkChecker(store, interval=3600)
+    probed = recording_probe(checker)
+
+    async def run():
+        checker.start()
+        await asyncio.sleep(0.05)
+        await checker.stop()
+
+    asyncio.run(run())
+    assert probed == []
@@ -0,0 +1,34 @@
+import pytest
+
+from search import LocalPager, SearchPager, SearchPagers
+from title_index import TitleIndex
+
+
+@pytest.fixture
+def index():
+    index = TitleIndex()
+    index.add("movie", 19995, "Avatar", None, "2009")
+    index.add("tv", 1396, "Breaking Bad", None, "2008")
+    index.add("movie", 13, "Forrest Gump", None, "1994")
+    return index
+
+
+def test_scores_by_match_tier(index):
+    [(exact, score)] = index.scored("avatar")
+    assert exact["id"] == "19995" and score == 2.0
+    assert index.scored("breaking")[0][1] == 1.5
+    assert index.scored("gump forr")[0][1] == 1.0
+    # Fautes de frappe, mots en trop : correspondance approchée, toujours sous 1
+    for query in ("avatar 2", "breakng bad", "forest gump"):
+        hits = index.scored(query)
+        assert hits and all(score < 1.0 for _, score in hits)
+
+
+def test_search_uses_tmdb_unless_the_local_match_is_strong(index):
+    pagers = SearchPagers(tmdb=None, page_size=9, index=index)
+    assert isinstance(pagers.get("Breaking"), LocalPager)
+    assert isinstance(pagers.get("forrest gump"), LocalPager)
+    assert isinstance(pagers.get("avatar 2"), SearchPager)
+    assert isinstance(pagers.get("breakng bad"), SearchPager)
+    # Recherche TMDB gardée en cache
+    assert pagers.get("avatar 2") is pagers.get("Avatar 2 ")
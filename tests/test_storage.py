@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+from storage import MemoryStore, SQLiteStore
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteStore(str(tmp_path / "catalogue.db"))
+    else:
+        store = MemoryStore(str(tmp_path / "db_links.json"))
+    yield store
+    store.close()
+
+
+def fav(media_id, titre, media_type=None):
+    return {"id": str(media_id), "titre": titre, "media_type": media_type, "poster_path": None, "year": None}
+
+
+def test_migration_leaves_typed_favorites_alone(store):
+    store.toggle_favorite(1, fav(1399, "Un film", "movie"))
+    store.toggle_favorite(2, fav(1399, "Game of Thrones"))
+    assert store.untyped_favorites() == {"1399": "Game of Thrones"}
+
+    store.update_favorites(1399, fav(1399, "Game of Thrones", "tv"))
+    assert [f["media_type"] for f in store.get_favorites(1)] == ["movie"]
+    assert [f["media_type"] for f in store.get_favorites(2)] == ["tv"]
+    assert store.untyped_favorites() == {}
+
+
+def test_movie_and_series_with_the_same_id_are_distinct_favorites(store):
+    assert store.toggle_favorite(1, fav(1399, "Un film", "movie"))
+    assert store.toggle_favorite(1, fav(1399, "Game of Thrones", "tv"))
+    assert sorted(f["media_type"] for f in store.get_favorites(1)) == ["movie", "tv"]
+
+    assert not store.toggle_favorite(1, fav(1399, "Game of Thrones", "tv"))
+    assert [f["media_type"] for f in store.get_favorites(1)] == ["movie"]
+
+
+def test_legacy_untyped_favorite_is_removed_by_toggle(store):
+    store.toggle_favorite(1, fav(550, "Fight Club"))
+    assert not store.toggle_favorite(1, fav(550, "Fight Club", "movie"))
+    assert store.get_favorites(1) == []
+
+
+def test_old_favorites_unique_constraint_is_migrated(tmp_path):
+    path = str(tmp_path / "catalogue.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE favorites (id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, media_id TEXT NOT NULL,
+                                titre TEXT NOT NULL, UNIQUE (user_id, media_id));
+        INSERT INTO favorites (user_id, media_id, titre) VALUES ('1', '1399', 'Game of Thrones');
+    """)
+    conn.close()
+
+    store = SQLiteStore(path)
+    try:
+        assert store.get_favorites(1) == [fav(1399, "Game of Thrones")]
+        store.update_favorites(1399, fav(1399, "Game of Thrones", "tv"))
+        assert store.toggle_favorite(1, fav(1399, "Un film", "movie"))
+        assert sorted(f["media_type"] for f in store.get_favorites(1)) == ["movie", "tv"]
+    finally:
+        store.close()
@@ -0,0 +1,76 @@
+import time
+
+
+class SlidingWindow:
+    """Compteur à fenêtre glissante par clé : au plus `limit` évènements
+    sur les `window` dernières secondes.
+
+    Approximation à deux fenêtres fixes (courante + précédente pondérée) :
+    mémoire constante par clé, quel que soit le nombre d'évènements.
+    """
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._counts = {}  # clé -> [index de fenêtre, compte courant, compte précédent]
+        self._pruned = 0
+
+    def _estimate(self, key, now):
+        idx, fraction = divmod(now / self.window, 1)
+        entry = self._counts.get(key)
+        if entry is None or entry[0] < idx - 1:
+            entry = self._counts[key] = [idx, 0, 0]
+        elif entry[0] < idx:
+            entry[:] = [idx, 0, entry[1]]
+        return entry, entry[2] * (1 - fraction) + entry[1]
+
+    def hit(self, key, now=None):
+        """Compte un évènement ; False (sans le compter) si la limite est atteinte."""
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        entry, count = self._estimate(key, now)
+        if count >= self.limit:
+            return False
+        entry[1] += 1
+        return True
+
+    def _prune(self, now):
+        # Une fois par fenêtre : oublie les clés inactives depuis deux fenêtres
+        if now - self._pruned < self.window:
+            return
+        self._pruned = now
+        idx = now // self.window
+        for key in [k for k, e in self._counts.items() if e[0] < idx - 1]:
+            del self._counts[key]
+
+
+class Throttle:
+    """Filtre placé devant les callbacks des commandes et composants :
+    utilisateurs bannis, débit par utilisateur et par serveur."""
+
+    BANNED, USER, GUILD = "banned", "user", "guild"
+
+    def __init__(self, user_limit=8, user_window=10.0, guild_limit=120, guild_window=10.0, banned=()):
+        self.users = SlidingWindow(user_limit, user_window)
+        self.guilds = SlidingWindow(guild_limit, guild_window)
+        self.banned = {str(u) for u in banned}
+        self._warned = SlidingWindow(1, user_window)
+        self.rejected = {self.BANNED: 0, self.USER: 0, self.GUILD: 0}
+
+    def check(self, user_id, guild_id=None):
+        """Renvoie None si l'interaction est acceptée, sinon la raison du refus."""
+        reason = None
+        if str(user_id) in self.banned:
+            reason = self.BANNED
+        elif not self.users.hit(user_id):
+            reason = self.USER
+        elif guild_id is not None and not self.guilds.hit(guild_id):
+            reason = self.GUILD
+        if reason:
+            self.rejected[reason] += 1
+        return reason
+
+    def should_warn(self, user_id):
+        """Un seul message de refus par fenêtre et par utilisateur :
+        au-delà, l'interaction est ignorée sans réponse."""
+        return self._warned.hit(user_id)
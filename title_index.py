@@ -0,0 +1,130 @@
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+FUZZY_MAX = 0.99  # Une correspondance approchée reste sous les correspondances par mots (score 1)
+
+
+def fold(text):
+    """Minuscules, sans accents ni ponctuation : "L'Été meurtrier" -> "l ete meurtrier"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(folded):
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Index local des titres du catalogue.
+
+    Chaque média est indexé par ses mots (recherche par préfixe, via une
+    liste triée) et par les trigrammes de ses titres (recherche approchée,
+    tolérante aux fautes de frappe).
+    """
+
+    def __init__(self, min_score=0.225):
+        self.min_score = min_score
+        self.entries = {}                    # (type, id) -> entrée
+        self._words = []                     # liste triée de (mot, (type, id))
+        self._trigrams = defaultdict(set)    # trigramme -> {(type, id)}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, media_type, media_id, title, original_title=None, year=None):
+        for item in self._insert(media_type, media_id, title, original_title, year):
+            bisect.insort(self._words, item)
+
+    def add_many(self, items):
+        """Ajout en masse (chargement au démarrage) de tuples
+        (type, id, titre, titre original, année) : un seul tri de la liste des
+        mots au lieu d'une insertion triée par mot."""
+        items = {(media_type, str(media_id)): rest for media_type, media_id, *rest in items}
+        for key in items.keys() & self.entries.keys():
+            self.remove(*key)
+        for key, rest in items.items():
+            self._words.extend(self._insert(*key, *rest))
+        self._words.sort()
+
+    def _insert(self, media_type, media_id, title, original_title=None, year=None):
+        """Enregistre l'entrée et ses trigrammes ; renvoie les (mot, clé) à ranger dans la liste des mots."""
+        key = (media_type, str(media_id))
+        if key in self.entries:
+            self.remove(*key)
+        names = {fold(t) for t in (title, original_title) if t}
+        names.discard("")
+        entry = {"media_type": media_type, "id": str(media_id), "title": title, "year": year,
+                 "names": names, "trigrams": set().union(*map(trigrams, names)) if names else set()}
+        self.entries[key] = entry
+        for tri in entry["trigrams"]:
+            self._trigrams[tri].add(key)
+        return [(word, key) for word in {w for name in names for w in name.split()}]
+
+    def remove(self, media_type, media_id):
+        key = (media_type, str(media_id))
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for word in {w for name in entry["names"] for w in name.split()}:
+            i = bisect.bisect_left(self._words, (word, key))
+            if i < len(self._words) and self._words[i] == (word, key):
+                del self._words[i]
+        for tri in entry["trigrams"]:
+            self._trigrams[tri].discard(key)
+            if not self._trigrams[tri]:
+                del self._trigrams[tri]
+
+    def _prefix(self, prefix):
+        i = bisect.bisect_left(self._words, (prefix,))
+        found = set()
+        while i < len(self._words) and self._words[i][0].startswith(prefix):
+            found.add(self._words[i][1])
+            i += 1
+        return found
+
+    def search(self, query, limit=25, media_type=None):
+        """Entrées correspondant à `query`, les meilleures en premier."""
+        return [entry for entry, _ in self.scored(query, limit, media_type)]
+
+    def scored(self, query, limit=25, media_type=None):
+        """Comme `search`, avec le score de chaque entrée : 2 pour un titre
+        identique, 1.5 pour un début de titre, 1 quand tous les mots sont des
+        préfixes de mots du titre ; en dessous de 1, correspondance approchée
+        (indice de Jaccard des trigrammes, plafonné à FUZZY_MAX)."""
+        q = fold(query)
+        if not q:
+            return []
+        scores = {}
+
+        # 1. Tous les mots de la requête sont des préfixes de mots du titre
+        words = q.split()
+        matched = self._prefix(words[0])
+        for w in words[1:]:
+            matched &= self._prefix(w)
+        for key in matched:
+            names = self.entries[key]["names"]
+            scores[key] = 2.0 if q in names else 1.5 if any(n.startswith(q) for n in names) else 1.0
+
+        # 2. Similarité de trigrammes (fautes de frappe, mots incomplets)
+        if len(scores) < limit:
+            q_tri = trigrams(q)
+            shared = defaultdict(int)
+            for tri in q_tri:
+                for key in self._trigrams.get(tri, ()):
+                    shared[key] += 1
+            for key, n in shared.items():
+                if key in scores:
+                    continue
+                score = min(n / len(q_tri | self.entries[key]["trigrams"]), FUZZY_MAX)
+                if score >= self.min_score:
+                    scores[key] = score
+
+        ranked = sorted(scores, key=lambda k: (-scores[k], self.entries[k]["title"] or ""))
+        if media_type:
+            ranked = [k for k in ranked if k[0] == media_type]
+        return [(self.entries[k], scores[k]) for k in ranked[:limit]]
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+import metrics
+from cache import TTLCache
+from ratelimit import CircuitBreaker, TokenBucket
+
+log = logging.getLogger(__name__)
+
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+
+# Durée de vie du cache (secondes) par type de ressource
+CACHE_TTLS = {
+    "search": 10 * 60,
+    "season": 6 * 3600,
+    "details": 6 * 3600,
+}
+
+
+def endpoint_kind(endpoint):
+    if endpoint.startswith("search/"):
+        return "search"
+    if "/season/" in endpoint:
+        return "season"
+    return "details"
+
+
+def media_meta(info):
+    """Métadonnées d'un média conservées dans le catalogue."""
+    date = info.get('release_date') or info.get('first_air_date') or ''
+    return {
+        "title": info.get('title') or info.get('name'),
+        "original_title": info.get('original_title') or info.get('original_name'),
+        "year": date[:4] or None,
+        "poster_path": info.get('poster_path'),
+        "genres": [g['name'] for g in info.get('genres', [])],
+    }
+
+
+class TMDBClient:
+    """Client TMDB asynchrone : une seule session aiohttp (keep-alive),
+    concurrence bornée et timeout par requête.
+    Les réponses sont mises en cache par endpoint et langue.
+
+    Le trafic sortant passe par un limiteur de débit (`rate` requêtes/s,
+    rafales de `burst`) et un coupe-circuit : quand TMDB est en panne, lent
+    ou que l'attente du limiteur serait trop longue, la dernière réponse
+    connue est servie depuis le cache, même expirée.
+    """
+
+    def __init__(self, api_key, language="fr-FR", max_concurrency=8, timeout=10, pool_size=20, cache_size=2048,
+                 rate=40, burst=40, max_wait=2.0, base_url=None):
+        self.api_key = api_key
+        self.base_url = base_url or TMDB_BASE_URL
+        self.language = language
+        self.cache = TTLCache(maxsize=cache_size)
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker()
+        self.max_wait = max_wait
+        self.counters = {"requests": 0, "errors": 0, "throttled": 0, "rejected": 0, "stale_served": 0}
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    def _get_session(self):
+        # Créée à la première requête pour être attachée à la boucle du bot
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def fetch(self, endpoint, **params):
+        """GET sur l'API TMDB. Renvoie {} en cas d'erreur, de refus du
+        coupe-circuit ou de limitation de débit."""
+        # Jeton et place dans le sémaphore d'abord : un appel autorisé par le
+        # coupe-circuit (essai semi-ouvert compris) part aussitôt et son
+        # résultat est toujours enregistré
+        waited = await self.bucket.acquire(self.max_wait)
+        if waited is None:
+            self.counters["rejected"] += 1
+            return {}
+        if waited:
+            self.counters["throttled"] += 1
+
+        query = {'api_key': self.api_key, 'language': self.language}
+        query.update(params)
+        url = f"{self.base_url}/{endpoint}"
+        labels = {"service": "tmdb", "endpoint": endpoint_kind(endpoint)}
+        async with self._sem:
+            if not self.breaker.allow():
+                self.counters["rejected"] += 1
+                return {}
+            self.counters["requests"] += 1
+            start = time.monotonic()
+            ok = None  # Résultat pour le coupe-circuit ; None : abandonné (annulation...)
+            try:
+                with metrics.timer(metrics.HTTP_SECONDS, **labels):
+                    async with self._get_session().get(url, params=query) as resp:
+                        if resp.status != 200:
+                            # 404 & co. : TMDB répond normalement, seul le contenu manque
+                            ok = resp.status < 500 and resp.status != 429
+                            self.counters["errors"] += 1
+                            metrics.HTTP_ERRORS.inc(status=resp.status, **labels)
+                            log.warning("TMDB %s -> HTTP %s", endpoint, resp.status)
+                            return {}
+                        data = await resp.json(content_type=None)
+                        ok = True
+                        return data
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # ValueError : réponse qui n'est pas du JSON
+                ok = False
+                self.counters["errors"] += 1
+                metrics.HTTP_ERRORS.inc(status=type(e).__name__, **labels)
+                log.warning("TMDB %s -> %r", endpoint, e)
+                return {}
+            finally:
+                if ok is None:
+                    self.breaker.release()
+                else:
+                    self.breaker.record(ok, time.monotonic() - start)
+
+    def _key(self, endpoint, **params):
+        return (endpoint, self.language, tuple(sorted(params.items())))
+
+    async def get(self, endpoint, **params):
+        """Comme `fetch`, en passant par le cache (TTL selon le type d'endpoint)."""
+        key = self._key(endpoint, **params)
+        ttl = CACHE_TTLS[endpoint_kind(endpoint)]
+        value = await self.cache.get_or_fetch(key, lambda: self.fetch(endpoint, **params), ttl)
+        if not value:
+            stale = self.cache.get_stale(key)
+            if stale:
+                self.counters["stale_served"] += 1
+                return stale
+        return value
+
+    def stats(self):
+        return dict(self.counters, breaker=self.breaker.state, breaker_trips=self.breaker.trips,
+                    cache=self.cache.stats())
+
+    async def search_page(self, query, page=1):
+        return await self.get("search/multi", query=query, page=page)
+
+    async def search(self, query):
+        data = await self.search_page(query)
+        return data.get('results', [])
+
+    async def details(self, endpoint):
+        return await self.get(endpoint)
+
+    async def details_with(self, endpoint, *appended):
+        """Détails et sous-ressources (« season/1 », « videos »...) en une seule
+        requête via append_to_response. Chaque partie est mise en cache comme
+        si elle avait été demandée seule. Renvoie (détails, {sous-ressource: données})."""
+        parts = [self._key(endpoint)] + [self._key(f"{endpoint}/{sub}") for sub in appended]
+        cached = [self.cache.get(key) for key in parts]
+        if all(cached):
+            return cached[0], dict(zip(appended, cached[1:]))
+        composite = self._key(endpoint, append_to_response=",".join(appended))
+        result = await self.cache.coalesce(composite, lambda: self._fetch_split(endpoint, appended))
+        if result:
+            return result
+        # TMDB indisponible : dernières réponses connues
+        stale = [self.cache.get_stale(key) or {} for key in parts]
+        if stale[0]:
+            self.counters["stale_served"] += 1
+        return stale[0], dict(zip(appended, stale[1:]))
+
+    async def _fetch_split(self, endpoint, appended):
+        data = await self.fetch(endpoint, append_to_response=",".join(appended))
+        if not data:
+            return None
+        subs = {sub: data.pop(sub, None) or {} for sub in appended}
+        self.cache.set(self._key(endpoint), data, CACHE_TTLS[endpoint_kind(endpoint)])
+        for sub, value in subs.items():
+            if value:
+                self.cache.set(self._key(f"{endpoint}/{sub}"), value, CACHE_TTLS[endpoint_kind(f"{endpoint}/{sub}")])
+        return data, subs
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()